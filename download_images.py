@@ -9,15 +9,29 @@ import os
 import re
 import asyncio
 import aiohttp
+import aiofiles
+import xxhash
 import logging
 import argparse
 import json
 import time
-import hashlib
+import random
+import functools
+import concurrent.futures
 from urllib.parse import urljoin, urlparse
-from bs4 import BeautifulSoup
+from selectolax.lexbor import LexborHTMLParser
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple, Any
+from typing import Dict, List, Optional, Set, Tuple, Any
+
+try:
+    import orjson
+except ImportError:  # Fall back to the standard library serializer
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # Only advertise brotli when responses can be decoded
+    brotli = None
 
 # Configure logging
 logging.basicConfig(
@@ -36,8 +50,70 @@ DEFAULT_OUTPUT_DIR = "kimuto-redesign/assets/images"
 DEFAULT_CACHE_DIR = ".cache"
 DEFAULT_MAX_RETRIES = 3
 DEFAULT_RETRY_DELAY = 2  # seconds
+MAX_RETRY_DELAY = 30  # seconds
+
+# posix_fallocate is not available on every platform (e.g. macOS, Windows)
+HAS_FALLOCATE = hasattr(os, 'posix_fallocate')
 DEFAULT_TIMEOUT = 30  # seconds
 DEFAULT_CONCURRENT_DOWNLOADS = 5
+DEFAULT_FRESHNESS = 86400  # seconds before a cached image is revalidated
+CACHE_SAVE_INTERVAL = 100  # downloads between cache checkpoints
+DOWNLOAD_CHUNK_SIZE = 64 * 1024  # bytes
+WRITE_BUFFER_SIZE = 256 * 1024  # bytes coalesced per file write
+IO_THREADS = 8  # threads dedicated to writing image files
+
+# Link targets with these extensions are not HTML pages and are never crawled
+SKIP_LINK_EXTENSIONS = ('.pdf', '.jpg', '.png')
+
+def is_retryable_status(status: int) -> bool:
+    """Server errors and rate limiting may succeed on retry; other client errors won't."""
+    return status >= 500 or status == 429
+
+@functools.lru_cache(maxsize=4096)
+def absolute_url(base_url: str, href: str) -> str:
+    """Resolve a (possibly relative) href against a base URL.
+    
+    Memoized because navigation links and shared images repeat on every page.
+    """
+    return urljoin(base_url, href)
+
+def parse_html(html: str, page_url: str, site_url: str) -> Tuple[List[str], List[str]]:
+    """Extract image URLs and same-site page URLs from an HTML document.
+    
+    Kept at module level so it can run in a worker process.
+    """
+    tree = LexborHTMLParser(html)
+    
+    # Find all image tags
+    image_urls = []
+    for img in tree.css('img[src]'):
+        src = img.attributes.get('src')
+        if src:
+            # Make relative URLs absolute
+            image_urls.append(absolute_url(page_url, src))
+    
+    # Find all links
+    page_urls = [page_url]
+    seen = {page_url}
+    base_netloc = urlparse(page_url).netloc
+    for a in tree.css('a[href]'):
+        href = a.attributes.get('href')
+        if not href:
+            continue
+        # Skip anchors, external links, and non-HTML files
+        if href.startswith('#') or href.startswith('http') and not href.startswith(site_url):
+            continue
+        if href.endswith(SKIP_LINK_EXTENSIONS):
+            continue
+        
+        # Make relative URLs absolute
+        link_url = absolute_url(page_url, href)
+        if link_url in seen or urlparse(link_url).netloc != base_netloc:
+            continue
+        seen.add(link_url)
+        page_urls.append(link_url)
+    
+    return image_urls, page_urls
 
 class ImageDownloader:
     """Class for downloading images from a website with caching and retry logic."""
@@ -50,7 +126,8 @@ class ImageDownloader:
                  retry_delay: int = DEFAULT_RETRY_DELAY,
                  timeout: int = DEFAULT_TIMEOUT,
                  concurrent_downloads: int = DEFAULT_CONCURRENT_DOWNLOADS,
-                 user_agent: str = "ImageDownloaderBot/1.0"):
+                 user_agent: str = "ImageDownloaderBot/1.0",
+                 freshness_secs: int = DEFAULT_FRESHNESS):
         """Initialize the image downloader with configuration."""
         self.base_url = base_url
         self.output_dir = output_dir
@@ -60,6 +137,7 @@ class ImageDownloader:
         self.timeout = timeout
         self.concurrent_downloads = concurrent_downloads
         self.user_agent = user_agent
+        self.freshness_secs = freshness_secs
         
         # Ensure directories exist
         os.makedirs(output_dir, exist_ok=True)
@@ -67,7 +145,33 @@ class ImageDownloader:
         
         # Load cache if exists
         self.cache_file = os.path.join(cache_dir, "image_cache.json")
-        self.cache = self._load_cache()
+        self.cache = self._migrate_legacy_keys(self._load_cache())
+        
+        # Companion cache of page validators and extracted URLs, keyed by
+        # "<kind>:<page url>", so unchanged pages can be answered with a 304
+        self.page_cache_file = os.path.join(cache_dir, "page_cache.json")
+        self.page_cache = self._load_cache(self.page_cache_file)
+        
+        # Successful downloads since the cache was last written
+        self._cache_dirty_count = 0
+        
+        # Process pool for HTML parsing, alive for the duration of a run
+        self._parse_pool: Optional[concurrent.futures.ProcessPoolExecutor] = None
+        
+        # Thread pool dedicated to file writes, alive for the duration of a run
+        self._io_pool: Optional[concurrent.futures.ThreadPoolExecutor] = None
+        
+        # Reusable write buffers, leased by downloads for the length of a transfer
+        self._buffer_pool: List[bytearray] = [
+            bytearray(WRITE_BUFFER_SIZE) for _ in range(concurrent_downloads)
+        ]
+        
+        # Filenames present in the output directory, refreshed on each run
+        self._existing_files: Set[str] = set()
+        
+        # Output filename chosen for each image URL, and the URL owning each name
+        self._url_filenames: Dict[str, str] = {}
+        self._filename_owners: Dict[str, str] = {}
         
         # Stats
         self.stats = {
@@ -78,60 +182,195 @@ class ImageDownloader:
             "retries": 0
         }
 
-    def _load_cache(self) -> Dict[str, Dict[str, Any]]:
-        """Load the cache from disk if it exists."""
-        if os.path.exists(self.cache_file):
+    def _load_cache(self, cache_file: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        """Load a cache from disk if it exists (the image cache by default)."""
+        cache_file = cache_file or self.cache_file
+        if os.path.exists(cache_file):
             try:
-                with open(self.cache_file, 'r') as f:
-                    return json.load(f)
+                with open(cache_file, 'rb') as f:
+                    data = f.read()
+                return orjson.loads(data) if orjson else json.loads(data)
             except (json.JSONDecodeError, IOError) as e:
                 logger.warning(f"Error loading cache file: {e}. Starting with empty cache.")
                 return {}
         return {}
     
-    def _save_cache(self) -> None:
-        """Save the cache to disk."""
+    def _migrate_legacy_keys(self, cache: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """Re-key image cache entries written by older versions, which used MD5 keys.
+        
+        Every entry records its URL, so the new key is computed from that once
+        at load time instead of probing for an MD5 key on each lookup.
+        """
+        migrated = {}
+        for key, entry in cache.items():
+            if len(key) == 32 and entry.get("url"):  # MD5 hex digest
+                # An entry already stored under the new key is more recent
+                migrated.setdefault(self._cache_key(entry["url"]), entry)
+            else:
+                migrated[key] = entry
+        return migrated
+    
+    def _write_cache_file(self, cache_file: str, cache: Dict[str, Any]) -> None:
+        """Write a cache to disk atomically via a temporary file."""
+        tmp_file = cache_file + ".tmp"
         try:
-            with open(self.cache_file, 'w') as f:
-                json.dump(self.cache, f)
+            with open(tmp_file, 'wb') as f:
+                if orjson:
+                    f.write(orjson.dumps(cache))
+                else:
+                    f.write(json.dumps(cache).encode('utf-8'))
+            os.replace(tmp_file, cache_file)
         except IOError as e:
             logger.error(f"Error saving cache: {e}")
     
-    async def download_image(self, session: aiohttp.ClientSession, url: str) -> Optional[str]:
-        """Download an image from a URL with caching and retry logic."""
-        # Parse the URL to get the filename
-        parsed_url = urlparse(url)
-        filename = os.path.basename(parsed_url.path)
+    def _save_cache(self) -> None:
+        """Save the image and page caches to disk."""
+        self._write_cache_file(self.cache_file, self.cache)
+        self._write_cache_file(self.page_cache_file, self.page_cache)
+        self._cache_dirty_count = 0
+    
+    def _checkpoint_cache(self) -> None:
+        """Save the cache every CACHE_SAVE_INTERVAL downloads so a crash loses little.
         
-        # Generate a cache key
-        url_hash = hashlib.md5(url.encode()).hexdigest()
+        Saving is synchronous, so concurrent download coroutines cannot interleave with it.
+        """
+        self._cache_dirty_count += 1
+        if self._cache_dirty_count >= CACHE_SAVE_INTERVAL:
+            self._save_cache()
+    
+    def _page_request_headers(self, cache_key: str) -> Dict[str, str]:
+        """Build conditional request headers for a cached page."""
+        headers = {}
+        cached = self.page_cache.get(cache_key)
+        if cached:
+            if cached.get("etag"):
+                headers["If-None-Match"] = cached["etag"]
+            if cached.get("last_modified"):
+                headers["If-Modified-Since"] = cached["last_modified"]
+        return headers
+    
+    def _update_page_cache(self, cache_key: str, response: aiohttp.ClientResponse, urls: List[str]) -> None:
+        """Remember the URLs extracted from a page along with its validators."""
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if etag or last_modified:
+            self.page_cache[cache_key] = {
+                "etag": etag,
+                "last_modified": last_modified,
+                "urls": urls
+            }
+    
+    def _backoff_delay(self, attempt: int) -> float:
+        """Exponential backoff with full jitter, capped at MAX_RETRY_DELAY."""
+        return random.uniform(0, min(MAX_RETRY_DELAY, self.retry_delay * (2 ** attempt)))
+    
+    async def _parse_html(self, html: str, page_url: str) -> Tuple[List[str], List[str]]:
+        """Parse a page off the event loop, in the process pool when available."""
+        if self._parse_pool is None:
+            return parse_html(html, page_url, self.base_url)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._parse_pool, parse_html, html, page_url, self.base_url)
+    
+    def _cache_key(self, url: str) -> str:
+        """Return the image cache key for a URL."""
+        return xxhash.xxh3_64_hexdigest(url.encode())
+    
+    def _assign_filename(self, url: str) -> str:
+        """Pick the output filename for an image URL, once per URL.
+        
+        Uses the URL's basename, or the name recorded in the cache, and adds a
+        short hash suffix when a different URL has already claimed that name.
+        """
+        if url in self._url_filenames:
+            return self._url_filenames[url]
+        
+        url_hash = self._cache_key(url)
+        filename = (self.cache.get(url_hash, {}).get("filename")
+                    or os.path.basename(urlparse(url).path)
+                    or url_hash)
+        if self._filename_owners.get(filename, url) != url:
+            stem, ext = os.path.splitext(filename)
+            filename = f"{stem}-{url_hash[:8]}{ext}"
+        
+        self._filename_owners.setdefault(filename, url)
+        self._url_filenames[url] = filename
+        return filename
+    
+    def _is_fresh(self, url: str, filename: str) -> bool:
+        """Check whether an image is on disk and was fetched within the freshness window.
+        
+        Fresh images are skipped without any request; stale ones are
+        revalidated with a conditional request.
+        """
+        entry = self.cache.get(self._cache_key(url))
+        return (entry is not None
+                and filename in self._existing_files
+                and time.time() - entry.get("downloaded_at", 0) < self.freshness_secs)
+    
+    async def _write_body(self, response: aiohttp.ClientResponse, f) -> None:
+        """Stream a response body to an open file through a pooled buffer.
+        
+        Network chunks are coalesced into a leased buffer so each file write
+        handles up to WRITE_BUFFER_SIZE bytes, and no per-download buffer is
+        allocated while the pool has spares.
+        """
+        buf = self._buffer_pool.pop() if self._buffer_pool else bytearray(WRITE_BUFFER_SIZE)
+        view = memoryview(buf)
+        filled = 0
+        try:
+            async for chunk in response.content.iter_chunked(DOWNLOAD_CHUNK_SIZE):
+                if filled + len(chunk) > len(buf):
+                    await f.write(view[:filled])
+                    filled = 0
+                view[filled:filled + len(chunk)] = chunk
+                filled += len(chunk)
+            if filled:
+                await f.write(view[:filled])
+        finally:
+            view.release()
+            self._buffer_pool.append(buf)
+    
+    async def download_image(self, session: aiohttp.ClientSession, url: str,
+                             filename: Optional[str] = None) -> Optional[str]:
+        """Download an image from a URL with caching and retry logic.
+        
+        Images that are on disk and within the freshness window are returned
+        without issuing a request.
+        """
+        if filename is None:
+            filename = self._assign_filename(url)
         
-        # Check if already downloaded
+        if self._is_fresh(url, filename):
+            self.stats["cached"] += 1
+            return filename
+        
+        # Generate a cache key
+        url_hash = self._cache_key(url)
         output_path = os.path.join(self.output_dir, filename)
-        if os.path.exists(output_path):
-            if url_hash in self.cache:
-                logger.info(f"Image already exists (cached): {filename}")
-                self.stats["cached"] += 1
-                return filename
+        
+        # Build request headers once; they are the same for every attempt.
+        # The User-Agent is set on the session. Conditional headers are only
+        # sent when the file is still on disk, since a 304 has no body.
+        headers = {}
+        cached = self.cache.get(url_hash, {})
+        if filename in self._existing_files:
+            # Add ETag from cache if available
+            if cached.get("etag"):
+                headers["If-None-Match"] = cached["etag"]
+            
+            # Add Last-Modified from cache if available
+            if cached.get("last_modified"):
+                headers["If-Modified-Since"] = cached["last_modified"]
         
         # Try to download with retries
         for attempt in range(self.max_retries):
             try:
-                headers = {"User-Agent": self.user_agent}
-                
-                # Add ETag from cache if available
-                if url_hash in self.cache and "etag" in self.cache[url_hash]:
-                    headers["If-None-Match"] = self.cache[url_hash]["etag"]
-                
-                # Add Last-Modified from cache if available
-                if url_hash in self.cache and "last_modified" in self.cache[url_hash]:
-                    headers["If-Modified-Since"] = self.cache[url_hash]["last_modified"]
-                
                 # Download the image
                 async with session.get(url, headers=headers, timeout=self.timeout) as response:
                     # Handle 304 Not Modified
                     if response.status == 304:
-                        logger.info(f"Image not modified (304): {filename}")
+                        logger.info("Image not modified (304): %s", filename)
+                        cached["downloaded_at"] = time.time()
                         self.stats["cached"] += 1
                         return filename
                     
@@ -141,9 +380,25 @@ class ImageDownloader:
                         etag = response.headers.get("ETag")
                         last_modified = response.headers.get("Last-Modified")
                         
-                        # Save the image
-                        with open(output_path, 'wb') as f:
-                            f.write(await response.read())
+                        # Stream the image to a temporary file, then move it into place
+                        part_path = output_path + ".part"
+                        try:
+                            async with aiofiles.open(part_path, 'wb', executor=self._io_pool) as f:
+                                # Reserve the full size up front to limit fragmentation.
+                                # Skipped for encoded bodies, whose length differs once decoded.
+                                size = response.content_length
+                                if size and HAS_FALLOCATE and "Content-Encoding" not in response.headers:
+                                    try:
+                                        os.posix_fallocate(f.fileno(), 0, size)
+                                    except OSError:
+                                        pass  # Not supported by this filesystem
+                                await self._write_body(response, f)
+                            os.replace(part_path, output_path)
+                            self._existing_files.add(filename)
+                        except BaseException:
+                            if os.path.exists(part_path):
+                                os.remove(part_path)
+                            raise
                         
                         # Update cache
                         self.cache[url_hash] = {
@@ -154,25 +409,29 @@ class ImageDownloader:
                             "last_modified": last_modified
                         }
                         
-                        logger.info(f"Downloaded: {filename}")
+                        self._checkpoint_cache()
+                        
+                        logger.info("Downloaded: %s", filename)
                         self.stats["new_downloads"] += 1
                         return filename
                     else:
-                        logger.warning(f"Failed to download {url}: HTTP {response.status} (Attempt {attempt+1}/{self.max_retries})")
+                        logger.warning("Failed to download %s: HTTP %s (Attempt %d/%d)", url, response.status, attempt + 1, self.max_retries)
+                        if not is_retryable_status(response.status):
+                            break
                         
                         if attempt < self.max_retries - 1:
                             self.stats["retries"] += 1
-                            await asyncio.sleep(self.retry_delay * (attempt + 1))  # Exponential backoff
+                            await asyncio.sleep(self._backoff_delay(attempt))
             except asyncio.TimeoutError:
-                logger.warning(f"Timeout downloading {url} (Attempt {attempt+1}/{self.max_retries})")
+                logger.warning("Timeout downloading %s (Attempt %d/%d)", url, attempt + 1, self.max_retries)
                 if attempt < self.max_retries - 1:
                     self.stats["retries"] += 1
-                    await asyncio.sleep(self.retry_delay * (attempt + 1))
+                    await asyncio.sleep(self._backoff_delay(attempt))
             except Exception as e:
-                logger.error(f"Error downloading {url}: {str(e)} (Attempt {attempt+1}/{self.max_retries})")
+                logger.error("Error downloading %s: %s (Attempt %d/%d)", url, e, attempt + 1, self.max_retries)
                 if attempt < self.max_retries - 1:
                     self.stats["retries"] += 1
-                    await asyncio.sleep(self.retry_delay * (attempt + 1))
+                    await asyncio.sleep(self._backoff_delay(attempt))
         
         # If all retries failed
         self.stats["failed"] += 1
@@ -181,72 +440,70 @@ class ImageDownloader:
     async def extract_image_urls_from_page(self, session: aiohttp.ClientSession, url: str) -> List[str]:
         """Extract all image URLs from a web page with retry logic."""
         image_urls = []
+        cache_key = f"images:{url}"
+        headers = self._page_request_headers(cache_key)
         
         for attempt in range(self.max_retries):
             try:
-                headers = {"User-Agent": self.user_agent}
                 async with session.get(url, headers=headers, timeout=self.timeout) as response:
+                    # Page unchanged since the last run
+                    if response.status == 304 and cache_key in self.page_cache:
+                        image_urls = self.page_cache[cache_key]["urls"]
+                        logger.info("Found %d images on %s (not modified)", len(image_urls), url)
+                        return image_urls
+                    
                     if response.status == 200:
                         html = await response.text()
-                        soup = BeautifulSoup(html, 'html.parser')
-                        
-                        # Find all image tags
-                        for img in soup.find_all('img'):
-                            src = img.get('src')
-                            if src:
-                                # Make relative URLs absolute
-                                image_url = urljoin(url, src)
-                                image_urls.append(image_url)
+                        image_urls, _ = await self._parse_html(html, url)
                         
-                        logger.info(f"Found {len(image_urls)} images on {url}")
+                        self._update_page_cache(cache_key, response, image_urls)
+                        logger.info("Found %d images on %s", len(image_urls), url)
                         return image_urls
                     else:
-                        logger.warning(f"Failed to fetch {url}: HTTP {response.status} (Attempt {attempt+1}/{self.max_retries})")
+                        logger.warning("Failed to fetch %s: HTTP %s (Attempt %d/%d)", url, response.status, attempt + 1, self.max_retries)
+                        if not is_retryable_status(response.status):
+                            break
                         if attempt < self.max_retries - 1:
-                            await asyncio.sleep(self.retry_delay * (attempt + 1))
+                            await asyncio.sleep(self._backoff_delay(attempt))
             except Exception as e:
-                logger.error(f"Error fetching {url}: {str(e)} (Attempt {attempt+1}/{self.max_retries})")
+                logger.error("Error fetching %s: %s (Attempt %d/%d)", url, e, attempt + 1, self.max_retries)
                 if attempt < self.max_retries - 1:
-                    await asyncio.sleep(self.retry_delay * (attempt + 1))
+                    await asyncio.sleep(self._backoff_delay(attempt))
         
         return []
 
     async def extract_page_urls(self, session: aiohttp.ClientSession, base_url: str) -> List[str]:
         """Extract all page URLs from the website with retry logic."""
         page_urls = [base_url]
+        cache_key = f"links:{base_url}"
+        headers = self._page_request_headers(cache_key)
         
         for attempt in range(self.max_retries):
             try:
-                headers = {"User-Agent": self.user_agent}
                 async with session.get(base_url, headers=headers, timeout=self.timeout) as response:
+                    # Page unchanged since the last run
+                    if response.status == 304 and cache_key in self.page_cache:
+                        page_urls = self.page_cache[cache_key]["urls"]
+                        logger.info("Found %d pages on the website (not modified)", len(page_urls))
+                        return page_urls
+                    
                     if response.status == 200:
                         html = await response.text()
-                        soup = BeautifulSoup(html, 'html.parser')
-                        
-                        # Find all links
-                        for a in soup.find_all('a', href=True):
-                            href = a['href']
-                            # Skip anchors, external links, and non-HTML files
-                            if href.startswith('#') or href.startswith('http') and not href.startswith(self.base_url):
-                                continue
-                            if href.endswith('.pdf') or href.endswith('.jpg') or href.endswith('.png'):
-                                continue
-                            
-                            # Make relative URLs absolute
-                            page_url = urljoin(base_url, href)
-                            if page_url not in page_urls and urlparse(page_url).netloc == urlparse(base_url).netloc:
-                                page_urls.append(page_url)
+                        _, page_urls = await self._parse_html(html, base_url)
                         
-                        logger.info(f"Found {len(page_urls)} pages on the website")
+                        self._update_page_cache(cache_key, response, page_urls)
+                        logger.info("Found %d pages on the website", len(page_urls))
                         return page_urls
                     else:
-                        logger.warning(f"Failed to fetch {base_url}: HTTP {response.status} (Attempt {attempt+1}/{self.max_retries})")
+                        logger.warning("Failed to fetch %s: HTTP %s (Attempt %d/%d)", base_url, response.status, attempt + 1, self.max_retries)
+                        if not is_retryable_status(response.status):
+                            break
                         if attempt < self.max_retries - 1:
-                            await asyncio.sleep(self.retry_delay * (attempt + 1))
+                            await asyncio.sleep(self._backoff_delay(attempt))
             except Exception as e:
-                logger.error(f"Error fetching {base_url}: {str(e)} (Attempt {attempt+1}/{self.max_retries})")
+                logger.error("Error fetching %s: %s (Attempt %d/%d)", base_url, e, attempt + 1, self.max_retries)
                 if attempt < self.max_retries - 1:
-                    await asyncio.sleep(self.retry_delay * (attempt + 1))
+                    await asyncio.sleep(self._backoff_delay(attempt))
         
         return [base_url]
 
@@ -254,55 +511,117 @@ class ImageDownloader:
         """Main method to download all images from the website."""
         start_time = time.time()
         
-        # Configure client session
+        # Snapshot the output directory once instead of stat-ing every image
+        with os.scandir(self.output_dir) as entries:
+            self._existing_files = {entry.name for entry in entries if entry.is_file()}
+        
+        # Configure client session. A single session is shared by page fetches
+        # and image downloads, so keep-alive connections and cached DNS lookups
+        # are reused for the whole run instead of reconnecting per request.
         timeout = aiohttp.ClientTimeout(total=self.timeout)
-        conn = aiohttp.TCPConnector(limit=self.concurrent_downloads)
+        conn = aiohttp.TCPConnector(
+            limit=self.concurrent_downloads,
+            limit_per_host=self.concurrent_downloads,
+            ttl_dns_cache=600,
+            keepalive_timeout=60,
+            force_close=False
+        )
         
-        async with aiohttp.ClientSession(timeout=timeout, connector=conn) as session:
-            # Extract all page URLs
-            page_urls = await self.extract_page_urls(session, self.base_url)
-            
-            # Extract image URLs from each page
-            all_image_urls = []
-            for page_url in page_urls:
-                image_urls = await self.extract_image_urls_from_page(session, page_url)
-                all_image_urls.extend(image_urls)
-            
-            # Remove duplicates
-            all_image_urls = list(set(all_image_urls))
-            self.stats["total_images_found"] = len(all_image_urls)
-            logger.info(f"Found {len(all_image_urls)} unique images across all pages")
-            
-            # Download all images with concurrency control
-            semaphore = asyncio.Semaphore(self.concurrent_downloads)
-            
-            async def download_with_semaphore(url):
-                async with semaphore:
-                    return await self.download_image(session, url)
-            
-            # Download all images
-            tasks = [download_with_semaphore(url) for url in all_image_urls]
-            downloaded_files = await asyncio.gather(*tasks)
-            
-            # Count successful downloads
-            successful = [f for f in downloaded_files if f]
-            
-            # Save cache
-            self._save_cache()
-            
-            # Calculate time taken
-            end_time = time.time()
-            elapsed = end_time - start_time
-            
-            # Update and return stats
-            self.stats["successful_downloads"] = len(successful)
-            self.stats["elapsed_time"] = elapsed
-            
-            logger.info(f"Downloaded {len(successful)} images to {self.output_dir}")
-            logger.info(f"Time taken: {elapsed:.2f} seconds")
-            logger.info(f"Stats: {self.stats}")
-            
-            return self.stats
+        # Limit concurrent page fetches; downloads are bounded by the worker count
+        semaphore = asyncio.Semaphore(self.concurrent_downloads)
+        
+        # Default headers apply to every request; aiohttp decodes compressed
+        # bodies transparently (brotli only when the brotli package is installed)
+        headers = {
+            "User-Agent": self.user_agent,
+            "Accept-Encoding": "gzip, deflate, br" if brotli else "gzip, deflate"
+        }
+        
+        # Parse pages on all cores so parsing does not stall network I/O
+        self._parse_pool = concurrent.futures.ProcessPoolExecutor(max_workers=os.cpu_count())
+        # Keep slow disk writes from competing with other blocking work on the loop's default executor
+        self._io_pool = concurrent.futures.ThreadPoolExecutor(max_workers=IO_THREADS, thread_name_prefix="img-io")
+        try:
+            async with aiohttp.ClientSession(timeout=timeout, connector=conn, headers=headers) as session:
+                # Extract all page URLs
+                page_urls = await self.extract_page_urls(session, self.base_url)
+                
+                # Pages are parsed and images downloaded as a pipeline: extractors
+                # feed unique image URLs into a queue that download workers drain
+                # while the remaining pages are still being fetched.
+                queue: asyncio.Queue = asyncio.Queue()
+                all_image_urls: Set[str] = set()
+                successful = []
+                
+                async def extract_and_enqueue(page_url):
+                    async with semaphore:
+                        image_urls = await self.extract_image_urls_from_page(session, page_url)
+                    for url in image_urls:
+                        if url in all_image_urls:
+                            continue
+                        all_image_urls.add(url)
+                        filename = self._assign_filename(url)
+                        # Skip recently downloaded images without any request
+                        if self._is_fresh(url, filename):
+                            self.stats["cached"] += 1
+                            successful.append(filename)
+                        else:
+                            queue.put_nowait((url, filename))
+                
+                async def download_worker():
+                    while True:
+                        url, filename = await queue.get()
+                        try:
+                            if await self.download_image(session, url, filename):
+                                successful.append(filename)
+                        except Exception as e:
+                            # Keep the worker alive so queue.join() can finish
+                            logger.exception("Unexpected error downloading %s: %s", url, e)
+                            self.stats["failed"] += 1
+                        finally:
+                            queue.task_done()
+                
+                workers = [asyncio.create_task(download_worker()) for _ in range(self.concurrent_downloads)]
+                try:
+                    results = await asyncio.gather(
+                        *[extract_and_enqueue(url) for url in page_urls],
+                        return_exceptions=True
+                    )
+                    for page_url, result in zip(page_urls, results):
+                        if isinstance(result, Exception):
+                            logger.error("Error extracting images from %s: %s", page_url, result)
+                    
+                    self.stats["total_images_found"] = len(all_image_urls)
+                    logger.info("Found %d unique images across all pages", len(all_image_urls))
+                    
+                    # Wait for the remaining downloads to finish
+                    await queue.join()
+                finally:
+                    for worker in workers:
+                        worker.cancel()
+                    await asyncio.gather(*workers, return_exceptions=True)
+                
+                # Save cache
+                self._save_cache()
+                
+                # Calculate time taken
+                end_time = time.time()
+                elapsed = end_time - start_time
+                
+                # Update and return stats
+                self.stats["successful_downloads"] = len(successful)
+                self.stats["elapsed_time"] = elapsed
+                
+                logger.info("Downloaded %d images to %s", len(successful), self.output_dir)
+                logger.info("Time taken: %.2f seconds", elapsed)
+                logger.info("Stats: %s", self.stats)
+                
+                return self.stats
+        finally:
+            self._parse_pool.shutdown()
+            self._parse_pool = None
+            self._io_pool.shutdown()
+            self._io_pool = None
 
 async def main():
     """Parse command-line arguments and run the image downloader."""
@@ -314,6 +633,7 @@ async def main():
     parser.add_argument('--retry-delay', type=int, default=DEFAULT_RETRY_DELAY, help=f'Delay between retries in seconds (default: {DEFAULT_RETRY_DELAY})')
     parser.add_argument('--timeout', type=int, default=DEFAULT_TIMEOUT, help=f'Request timeout in seconds (default: {DEFAULT_TIMEOUT})')
     parser.add_argument('--concurrent', type=int, default=DEFAULT_CONCURRENT_DOWNLOADS, help=f'Number of concurrent downloads (default: {DEFAULT_CONCURRENT_DOWNLOADS})')
+    parser.add_argument('--freshness', type=int, default=DEFAULT_FRESHNESS, help=f'Seconds before cached images are revalidated (default: {DEFAULT_FRESHNESS})')
     parser.add_argument('--user-agent', default="ImageDownloaderBot/1.0", help='User agent string to use for requests')
     parser.add_argument('--verbose', '-v', action='store_true', help='Enable verbose logging')
     
@@ -333,7 +653,8 @@ async def main():
             retry_delay=args.retry_delay,
             timeout=args.timeout,
             concurrent_downloads=args.concurrent,
-            user_agent=args.user_agent
+            user_agent=args.user_agent,
+            freshness_secs=args.freshness
         )
         
         stats = await downloader.download_all_images()
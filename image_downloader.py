@@ -9,13 +9,101 @@ that have already been crawled.
 import os
 import re
 import json
+import mmap
+import hashlib
+import itertools
 import asyncio
 import aiohttp
+import aiofiles
+import xxhash
 import logging
-from bs4 import BeautifulSoup
+from concurrent.futures import ProcessPoolExecutor
+from bs4 import BeautifulSoup, SoupStrainer
+from html import unescape
 from urllib.parse import urlparse, urljoin
 from pathlib import Path
 
+try:
+    import orjson
+except ImportError:  # Fall back to the standard library serializer
+    orjson = None
+
+# Connection limits for image downloads
+MAX_CONNECTIONS = 100
+MAX_CONNECTIONS_PER_HOST = 10
+DOWNLOAD_TIMEOUT = 30  # seconds
+CONNECT_TIMEOUT = 10  # seconds
+DOWNLOAD_CHUNK_SIZE = 64 * 1024  # bytes
+WRITE_BUFFER_SIZE = 512 * 1024  # bytes
+
+# posix_fallocate is not available on every platform (e.g. macOS, Windows)
+HAS_FALLOCATE = hasattr(os, 'posix_fallocate')
+
+# Prefer the C-backed lxml parser, falling back to the pure-Python one
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = 'lxml'
+except ImportError:
+    HTML_PARSER = 'html.parser'
+
+# Only <img> and <base> tags are needed, so skip building the rest of the tree
+IMAGE_TAGS = SoupStrainer(['img', 'base'])
+
+# First absolute URL in a page, used as its base when there is no <base> tag
+ABSOLUTE_URL_RE = re.compile(rb'https?://[^"\'>\s]+')
+
+# Characters not allowed in saved image filenames. ASCII names (the common
+# case) are sanitized with a translation table; others need the Unicode-aware regex.
+UNSAFE_FILENAME_RE = re.compile(r'[^\w\-\.]')
+UNSAFE_ASCII_TABLE = str.maketrans({
+    chr(c): '_' for c in range(128) if not (chr(c).isalnum() or chr(c) in '-._')
+})
+
+# Precompiled patterns for the regex fast path. Tag patterns skip over quoted
+# attribute values so a '>' inside one does not end the tag early.
+IMG_TAG_RE = re.compile(rb'<img\b(?:[^>"\']|"[^"]*"|\'[^\']*\')*>', re.I)
+BASE_TAG_RE = re.compile(rb'<base\b(?:[^>"\']|"[^"]*"|\'[^\']*\')*>', re.I)
+ATTR_RE = re.compile(rb'(?<![\w-])([\w-]+)\s*=\s*(?:"([^"]*)"|\'([^\']*)\'|([^\s"\'>]+))')
+
+def _tag_attrs(tag: bytes) -> dict:
+    """Decode the attributes of a single tag into a dict with lowercase names."""
+    attrs = {}
+    for name, double, single, bare in ATTR_RE.findall(tag):
+        name = name.decode('ascii', 'replace').lower()
+        if name not in attrs:
+            attrs[name] = unescape((double or single or bare).decode('utf-8', 'replace'))
+    return attrs
+
+def scan_image_tags(html: bytes) -> tuple:
+    """Find the <base> href and (src, alt) of each <img> with regexes."""
+    base_url = None
+    base_match = BASE_TAG_RE.search(html)
+    if base_match:
+        base_url = _tag_attrs(base_match.group(0)).get('href') or None
+    
+    img_attrs = []
+    for match in IMG_TAG_RE.finditer(html):
+        attrs = _tag_attrs(match.group(0))
+        if attrs.get('src'):
+            img_attrs.append((attrs['src'], attrs.get('alt', '')))
+    return base_url, img_attrs
+
+def parse_image_tags(html: str) -> tuple:
+    """Find the <base> href and (src, alt) of each <img> with BeautifulSoup."""
+    soup = BeautifulSoup(html, HTML_PARSER, parse_only=IMAGE_TAGS)
+    
+    base_url = None
+    base_tag = soup.find('base', href=True)
+    if base_tag and base_tag['href']:
+        base_url = base_tag['href']
+    
+    img_attrs = []
+    for img in soup.find_all('img', src=True):
+        attrs = img.attrs
+        if attrs['src']:
+            img_attrs.append((attrs['src'], attrs.get('alt', '')))
+    return base_url, img_attrs
+
 # Set up logging
 logging.basicConfig(
     level=logging.INFO,
@@ -23,6 +111,88 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+def extract_images_from_html(html_file: str) -> list:
+    """Extract image URLs from an HTML file.
+    
+    Module-level so it can be run in a worker process.
+    """
+    images = []
+    try:
+        if os.path.getsize(html_file) == 0:
+            return images
+        
+        # Memory-map the file so the regexes scan it in place while the
+        # kernel pages it in, instead of copying it into a bytes object first
+        with open(html_file, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as html:
+            # Scan for tags with precompiled regexes, and only build a tree
+            # when that finds nothing (e.g. malformed markup)
+            base_url, img_attrs = scan_image_tags(html)
+            if not img_attrs:
+                base_url, img_attrs = parse_image_tags(html[:].decode('utf-8'))
+            
+            if not base_url:
+                # Try to extract from file name or content
+                match = ABSOLUTE_URL_RE.search(html)
+                if match:
+                    base_url = match.group(0).decode('utf-8', 'replace')
+        
+        if not base_url:
+            base_url = "https://mac-template.webflow.io/"
+        
+        # Find all images, skipping repeats within the page
+        seen_urls = set()
+        for src, alt in img_attrs:
+            # Make URL absolute
+            if not src.startswith(('http://', 'https://')):
+                img_url = urljoin(base_url, src)
+            else:
+                img_url = src
+            
+            if img_url in seen_urls:
+                continue
+            seen_urls.add(img_url)
+            
+            # Store image info
+            images.append({
+                'url': img_url,
+                'alt': alt,
+                'filename': url_to_filename(img_url)
+            })
+    except Exception as e:
+        logger.error(f"Error extracting images from {html_file}: {str(e)}")
+    
+    return images
+
+def url_to_filename(url: str) -> str:
+    """Convert a URL to a safe filename."""
+    # Parse the URL
+    parsed = urlparse(url)
+    
+    # Get the path and query
+    path = parsed.path
+    
+    # Get the file name from the path
+    filename = os.path.basename(path)
+    
+    # If no filename or it doesn't have an extension, use a hash of the URL
+    if not filename or '.' not in filename:
+        filename = xxhash.xxh3_64_hexdigest(url.encode()) + '.jpg'
+    
+    # Make sure the filename is safe
+    if filename.isascii():
+        filename = filename.translate(UNSAFE_ASCII_TABLE)
+    else:
+        filename = UNSAFE_FILENAME_RE.sub('_', filename)
+    
+    return filename
+
+def legacy_filenames(url: str) -> list:
+    """Names that earlier versions gave an extensionless image."""
+    filename = os.path.basename(urlparse(url).path)
+    if filename and '.' in filename:
+        return []
+    return [hashlib.md5(url.encode()).hexdigest() + '.jpg']
+
 class ImageDownloader:
     """Downloads images from HTML files."""
     
@@ -33,6 +203,7 @@ class ImageDownloader:
         self.stats = {
             "images_found": 0,
             "images_downloaded": 0,
+            "images_existing": 0,
             "bytes_downloaded": 0
         }
         
@@ -41,77 +212,16 @@ class ImageDownloader:
     
     def get_html_files(self) -> list:
         """Get all HTML files in the HTML directory."""
-        html_files = []
-        for file in os.listdir(self.html_dir):
-            if file.endswith('.html'):
-                html_files.append(os.path.join(self.html_dir, file))
-        return html_files
+        with os.scandir(self.html_dir) as entries:
+            return [entry.path for entry in entries if entry.is_file() and entry.name.endswith('.html')]
     
     def extract_images_from_html(self, html_file: str) -> list:
         """Extract image URLs from an HTML file."""
-        images = []
-        try:
-            with open(html_file, 'r', encoding='utf-8') as f:
-                html = f.read()
-                
-                # Parse HTML
-                soup = BeautifulSoup(html, 'html.parser')
-                
-                # Find base URL
-                base_url = None
-                base_tag = soup.find('base', href=True)
-                if base_tag and base_tag['href']:
-                    base_url = base_tag['href']
-                else:
-                    # Try to extract from file name or content
-                    match = re.search(r'https?://[^"\'>\s]+', html)
-                    if match:
-                        base_url = match.group(0)
-                
-                if not base_url:
-                    base_url = "https://mac-template.webflow.io/"
-                
-                # Find all images
-                for img in soup.find_all('img', src=True):
-                    src = img.get('src')
-                    if src:
-                        # Make URL absolute
-                        if not src.startswith(('http://', 'https://')):
-                            img_url = urljoin(base_url, src)
-                        else:
-                            img_url = src
-                        
-                        # Store image info
-                        images.append({
-                            'url': img_url,
-                            'alt': img.get('alt', ''),
-                            'filename': self.url_to_filename(img_url)
-                        })
-        except Exception as e:
-            logger.error(f"Error extracting images from {html_file}: {str(e)}")
-        
-        return images
+        return extract_images_from_html(html_file)
     
     def url_to_filename(self, url: str) -> str:
         """Convert a URL to a safe filename."""
-        # Parse the URL
-        parsed = urlparse(url)
-        
-        # Get the path and query
-        path = parsed.path
-        
-        # Get the file name from the path
-        filename = os.path.basename(path)
-        
-        # If no filename or it doesn't have an extension, use a hash of the URL
-        if not filename or '.' not in filename:
-            import hashlib
-            filename = hashlib.md5(url.encode()).hexdigest() + '.jpg'
-        
-        # Make sure the filename is safe
-        filename = re.sub(r'[^\w\-\.]', '_', filename)
-        
-        return filename
+        return url_to_filename(url)
     
     async def download_image(self, session: aiohttp.ClientSession, img_info: dict) -> bool:
         """Download an image."""
@@ -119,6 +229,21 @@ class ImageDownloader:
         filename = img_info['filename']
         filepath = os.path.join(self.output_dir, filename)
         
+        # Skip images already downloaded by a previous run. Downloads are
+        # written to a temporary file first, so a non-empty file is complete.
+        if os.path.exists(filepath) and os.path.getsize(filepath) > 0:
+            self.stats["images_existing"] += 1
+            return True
+        
+        # Adopt a copy saved under the name an earlier version used
+        for legacy_name in legacy_filenames(url):
+            legacy_path = os.path.join(self.output_dir, legacy_name)
+            if os.path.exists(legacy_path) and os.path.getsize(legacy_path) > 0:
+                os.replace(legacy_path, filepath)
+                self.stats["images_existing"] += 1
+                return True
+        
+        part_path = filepath + ".part"
         try:
             async with session.get(url) as response:
                 if response.status == 200:
@@ -128,24 +253,42 @@ class ImageDownloader:
                         logger.warning(f"Skipping {url} - not an image (content-type: {content_type})")
                         return False
                     
-                    # Get content
-                    content = await response.read()
-                    
-                    # Save to file
-                    with open(filepath, 'wb') as f:
-                        f.write(content)
+                    # Stream content to file, coalescing chunks so each
+                    # write() call flushes at least WRITE_BUFFER_SIZE bytes
+                    total = 0
+                    buffer = bytearray()
+                    async with aiofiles.open(part_path, 'wb') as f:
+                        # Reserve the full size in one call to limit fragmentation.
+                        # Skipped for encoded bodies, whose length differs once decoded.
+                        size = response.content_length
+                        if size and HAS_FALLOCATE and "Content-Encoding" not in response.headers:
+                            try:
+                                os.posix_fallocate(f.fileno(), 0, size)
+                            except OSError:
+                                pass  # Not supported by this filesystem
+                        async for chunk in response.content.iter_chunked(DOWNLOAD_CHUNK_SIZE):
+                            buffer += chunk
+                            total += len(chunk)
+                            if len(buffer) >= WRITE_BUFFER_SIZE:
+                                await f.write(buffer)
+                                buffer.clear()
+                        if buffer:
+                            await f.write(buffer)
+                    os.replace(part_path, filepath)
                     
                     # Update stats
                     self.stats["images_downloaded"] += 1
-                    self.stats["bytes_downloaded"] += len(content)
+                    self.stats["bytes_downloaded"] += total
                     
-                    logger.info(f"Downloaded {url} to {filepath} ({len(content)} bytes)")
+                    logger.info(f"Downloaded {url} to {filepath} ({total} bytes)")
                     return True
                 else:
                     logger.warning(f"Failed to download {url}: {response.status}")
                     return False
         except Exception as e:
             logger.error(f"Error downloading {url}: {str(e)}")
+            if os.path.exists(part_path):
+                os.remove(part_path)
             return False
     
     async def download_images(self):
@@ -154,32 +297,43 @@ class ImageDownloader:
         html_files = self.get_html_files()
         logger.info(f"Found {len(html_files)} HTML files")
         
-        # Extract images from HTML files
-        all_images = []
-        for html_file in html_files:
-            images = self.extract_images_from_html(html_file)
-            all_images.extend(images)
-        
-        # Remove duplicates (by URL)
-        unique_images = {img['url']: img for img in all_images}.values()
+        # Extract images from HTML files, parsing them in parallel across cores
+        loop = asyncio.get_running_loop()
+        with ProcessPoolExecutor(max_workers=os.cpu_count()) as pool:
+            results = await asyncio.gather(*[
+                loop.run_in_executor(pool, extract_images_from_html, html_file)
+                for html_file in html_files
+            ])
+        # Merge results, keeping only the first occurrence of each URL
+        seen_urls = set()
+        unique_images = []
+        for img in itertools.chain.from_iterable(results):
+            if img['url'] not in seen_urls:
+                seen_urls.add(img['url'])
+                unique_images.append(img)
         self.stats["images_found"] = len(unique_images)
         
         logger.info(f"Found {len(unique_images)} unique images to download")
         
-        # Download images
-        async with aiohttp.ClientSession() as session:
-            tasks = []
-            for img in unique_images:
-                tasks.append(self.download_image(session, img))
-            
-            # Run downloads with a limit of 5 concurrent downloads
-            semaphore = asyncio.Semaphore(5)
-            
-            async def download_with_semaphore(img):
-                async with semaphore:
-                    return await self.download_image(session, img)
-            
-            results = await asyncio.gather(*[download_with_semaphore(img) for img in unique_images])
+        # Download images. The connector keeps connections alive so TLS
+        # handshakes are reused. aiohttp counts time spent waiting for a pool
+        # slot against the request timeout, so a semaphore no larger than the
+        # per-host limit keeps queued downloads from timing out before they start.
+        connector = aiohttp.TCPConnector(
+            limit=MAX_CONNECTIONS,
+            limit_per_host=MAX_CONNECTIONS_PER_HOST,
+            ttl_dns_cache=300,
+            keepalive_timeout=30
+        )
+        timeout = aiohttp.ClientTimeout(total=DOWNLOAD_TIMEOUT, connect=CONNECT_TIMEOUT)
+        semaphore = asyncio.Semaphore(MAX_CONNECTIONS_PER_HOST)
+
+        async def download_with_semaphore(img):
+            async with semaphore:
+                return await self.download_image(session, img)
+
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+            await asyncio.gather(*[download_with_semaphore(img) for img in unique_images])
         
         # Save stats
         self.save_stats()
@@ -192,8 +346,11 @@ class ImageDownloader:
         os.makedirs(stats_dir, exist_ok=True)
         
         stats_file = os.path.join(stats_dir, 'image_stats.json')
-        with open(stats_file, 'w') as f:
-            json.dump(self.stats, f, indent=2)
+        if orjson:
+            Path(stats_file).write_bytes(orjson.dumps(self.stats, option=orjson.OPT_INDENT_2))
+        else:
+            with open(stats_file, 'w') as f:
+                json.dump(self.stats, f, indent=2)
         
         logger.info(f"Stats saved to {stats_file}")
 
@@ -209,6 +366,7 @@ async def main():
     print(f"\nImage download completed!")
     print(f"Images found: {stats['images_found']}")
     print(f"Images downloaded: {stats['images_downloaded']}")
+    print(f"Images already present: {stats['images_existing']}")
     print(f"Total bytes downloaded: {stats['bytes_downloaded']} bytes ({stats['bytes_downloaded']/1024:.1f} KB)")
 
 if __name__ == "__main__":
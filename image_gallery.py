@@ -8,37 +8,31 @@ the Mac template website.
 
 import os
 import json
-from flask import Flask, render_template_string, send_from_directory, redirect
+import functools
+from pathlib import Path
+from flask import Flask, send_from_directory, redirect
+
+try:
+    import orjson
+except ImportError:  # Fall back to the standard library parser
+    orjson = None
 
 app = Flask(__name__)
 
+# Let a fronting web server (e.g. nginx) stream image files via sendfile
+app.config['USE_X_SENDFILE'] = os.environ.get('USE_X_SENDFILE', '0') == '1'
+
 # Directory where images are stored
 IMAGE_DIR = "./mac_template_output/images"
 STATS_DIR = "./mac_template_output/stats"
 
-@app.route('/')
-def index():
-    """Display an image gallery."""
-    if not os.path.exists(IMAGE_DIR):
-        return "No images found. Please run the image downloader first."
-    
-    # Get all image files
-    image_files = []
-    for file in os.listdir(IMAGE_DIR):
-        if file.lower().endswith(('.png', '.jpg', '.jpeg', '.gif', '.svg', '.webp')):
-            image_files.append(file)
-    
-    # Sort by filename
-    image_files.sort()
-    
-    # Get stats if available
-    stats = None
-    stats_file = os.path.join(STATS_DIR, 'image_stats.json')
-    if os.path.exists(stats_file):
-        with open(stats_file, 'r') as f:
-            stats = json.load(f)
-    
-    template = """
+# How long browsers may cache gallery images, in seconds
+IMAGE_MAX_AGE = 86400
+
+# File extensions shown in the gallery
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.gif', '.svg', '.webp')
+
+GALLERY_TEMPLATE_SOURCE = """
     <!DOCTYPE html>
     <html lang="en">
     <head>
@@ -185,6 +179,9 @@ def index():
                 <h2>Image Statistics</h2>
                 <p><strong>Images Found:</strong> {{ stats.images_found }}</p>
                 <p><strong>Images Downloaded:</strong> {{ stats.images_downloaded }}</p>
+                {% if stats.images_existing %}
+                <p><strong>Already Downloaded:</strong> {{ stats.images_existing }}</p>
+                {% endif %}
                 <p><strong>Total Download Size:</strong> {{ stats.bytes_downloaded }} bytes ({{ stats.bytes_downloaded / 1024 | int }} KB)</p>
             </div>
             {% endif %}
@@ -193,8 +190,8 @@ def index():
             
             {% if image_files %}
             <div class="gallery">
-                {% for image in image_files %}
-                <div class="gallery-item {% if image.endswith('.svg') %}svg-item{% endif %}" onclick="openModal('{{ image }}')">
+                {% for image, is_svg in image_files %}
+                <div class="gallery-item {% if is_svg %}svg-item{% endif %}" onclick="openModal('{{ image }}')">
                     <img src="/images/{{ image }}" alt="{{ image }}">
                     <div class="image-info">
                         <h3>{{ image }}</h3>
@@ -249,14 +246,52 @@ def index():
         </script>
     </body>
     </html>
-    """
+"""
+
+# Compiled once at import instead of on every request
+GALLERY_TEMPLATE = app.jinja_env.from_string(GALLERY_TEMPLATE_SOURCE)
+
+@app.route('/')
+def index():
+    """Display an image gallery."""
+    if not os.path.exists(IMAGE_DIR):
+        return "No images found. Please run the image downloader first."
+    
+    # The page only changes when images are added/removed or stats are rewritten
+    stats_file = os.path.join(STATS_DIR, 'image_stats.json')
+    stats_mtime = os.stat(stats_file).st_mtime_ns if os.path.exists(stats_file) else None
+    return render_gallery(os.stat(IMAGE_DIR).st_mtime_ns, stats_mtime)
+
+@functools.lru_cache(maxsize=1)
+def render_gallery(image_dir_mtime: int, stats_mtime) -> str:
+    """Render the gallery page, cached on the image directory and stats file mtimes."""
+    # Get all image files
+    with os.scandir(IMAGE_DIR) as entries:
+        image_files = [
+            entry.name for entry in entries
+            if entry.is_file() and entry.name.lower().endswith(IMAGE_EXTENSIONS)
+        ]
+    
+    # Sort by filename, flagging SVGs (styled differently) here rather than in the template
+    image_files.sort()
+    image_files = [(name, name.lower().endswith('.svg')) for name in image_files]
+    
+    # Get stats if available
+    stats = None
+    stats_file = os.path.join(STATS_DIR, 'image_stats.json')
+    if stats_mtime is not None:
+        if orjson:
+            stats = orjson.loads(Path(stats_file).read_bytes())
+        else:
+            with open(stats_file, 'r') as f:
+                stats = json.load(f)
     
-    return render_template_string(template, image_files=image_files, stats=stats)
+    return GALLERY_TEMPLATE.render(image_files=image_files, stats=stats)
 
 @app.route('/images/<filename>')
 def images(filename):
-    """Serve images."""
-    return send_from_directory(IMAGE_DIR, filename)
+    """Serve images, answering revalidations with 304 Not Modified."""
+    return send_from_directory(IMAGE_DIR, filename, max_age=IMAGE_MAX_AGE, conditional=True)
 
 if __name__ == '__main__':
     print("Mac Template Image Gallery starting at http://127.0.0.1:5002")
@@ -1,16 +1,27 @@
 import os
-import json
 import uuid
 import time
+import shutil
 import asyncio
 import logging
 import datetime
+import threading
 from pathlib import Path
-from glob import glob
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
 
-from flask import Flask, request, jsonify, render_template, send_from_directory
+import msgspec
+import xxhash
+from flask import Flask, request, render_template, send_from_directory
+from werkzeug.routing import BaseConverter
 from serverless_crawler import ServerlessCrawler, run_crawler
 
+try:
+    import uvloop
+except ImportError:  # Fall back to the default selector event loop
+    uvloop = None
+
 # Debug message at startup
 print("DEBUG: Starting server using serverless_api.py")
 print("DEBUG: Template folder path: templates")
@@ -19,15 +30,28 @@ print("DEBUG: Static folder path: " + os.path.join(os.path.dirname(os.path.abspa
 # Verify environment and setup proper paths for Vercel
 IS_VERCEL = os.environ.get('VERCEL', '0') == '1'
 ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+STATIC_DIR = os.path.join(ROOT_DIR, 'static')
+INDEX_TEMPLATE = os.path.join(ROOT_DIR, 'templates', 'index.html')
 
 # Configuration
 OUTPUT_DIR = os.environ.get('OUTPUT_DIR', '/tmp/crawler_output' if IS_VERCEL else './output')
 MAX_PAGES = int(os.environ.get('MAX_PAGES', 50))
 MAX_DEPTH = int(os.environ.get('MAX_DEPTH', 3))
+JOB_LOAD_THREADS = 8  # Threads reading changed job files in load_jobs
+JOBS_RESCAN_INTERVAL = 5  # Seconds load_jobs reuses a scan whose OUTPUT_DIR mtime is unchanged
+RESOURCE_TYPES = ('css', 'js', 'images', 'fonts')  # Resource subdirectories of a job
+RESOURCE_TYPE_SET = frozenset(RESOURCE_TYPES)  # For validating resource types from URLs
+
+class JobIdConverter(BaseConverter):
+    """Only route job IDs shaped like the uuid4 strings start_crawl creates"""
+    regex = r'[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}'
 
 # Initialize Flask app
 app = Flask(__name__)
+app.url_map.converters['job_id'] = JobIdConverter
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max upload size
+# Let a fronting server stream files with sendfile instead of copying them through Python
+app.config['USE_X_SENDFILE'] = os.environ.get('USE_X_SENDFILE', '0') == '1'
 
 # Ensure output directory exists
 os.makedirs(OUTPUT_DIR, exist_ok=True)
@@ -50,124 +74,286 @@ Crawlr is a web archiving tool for educational and personal use.
 Please use responsibly and respect website owners' rights, robots.txt directives, and rate limits.
 """
 
-# Load existing job data
-def load_jobs():
-    """Load existing jobs from the output directory"""
-    global active_jobs, completed_jobs
+class JobState(msgspec.Struct):
+    """Fields of a job's state.json that the API reads"""
+    url: Optional[str] = None
+    status: Optional[str] = None
+    start_time: Optional[str] = None
+    last_run: Optional[str] = None
+    queue: list = []
+    in_progress: list = []
+    visited: list = []
+    visited_count: Optional[int] = None
+
+class JobStats(msgspec.Struct):
+    """Fields of a job's stats.json that the API reads"""
+    pages_crawled: int = 0
+    links_found: int = 0
+    resources: dict = {}
+
+class ActiveJob(msgspec.Struct):
+    """A job that is still crawling, as shown on the index page and by job_status"""
+    id: str
+    url: Optional[str]
+    status: Optional[str]
+    pages_completed: int
+    max_pages: int
+    progress: int
+    last_run: Optional[str]
+
+class CompletedJob(msgspec.Struct):
+    """A finished job, as shown on the index page and by job_status"""
+    id: str
+    url: Optional[str]
+    date: str
+    pages: int
+    resources: dict
+    links_found: int
+
+# Typed decoders skip building a dict for every field we never look at
+STATE_DECODER = msgspec.json.Decoder(JobState)
+STATS_DECODER = msgspec.json.Decoder(JobStats)
+
+def read_job_state(state_file):
+    """Decode a job's state.json into a JobState"""
+    with open(state_file, 'rb') as f:
+        return STATE_DECODER.decode(f.read())
+
+def read_job_stats(stats_file):
+    """Decode a job's stats.json into a JobStats"""
+    with open(stats_file, 'rb') as f:
+        return STATS_DECODER.decode(f.read())
+
+def list_dir_names(path):
+    """Names of the visible entries in a directory, or [] if it doesn't exist"""
+    try:
+        with os.scandir(path) as entries:
+            return [entry.name for entry in entries if not entry.name.startswith('.')]
+    except FileNotFoundError:
+        return []
+
+def page_progress(pages_crawled):
+    """Percentage of MAX_PAGES that a job has crawled"""
+    # Integer math, so a finished job reads exactly 100
+    return pages_crawled * 100 // MAX_PAGES if MAX_PAGES > 0 else 0
+
+def format_start_date(start_time):
+    """Format an ISO-8601 start time as 'YYYY-MM-DD HH:MM' by slicing instead of parsing"""
+    if not start_time or len(start_time) < 16:
+        return ""
+    return f"{start_time[:10]} {start_time[11:16]}"
+
+def count_dir_entries(path):
+    """Count the visible entries in a directory without building a list of them"""
+    try:
+        with os.scandir(path) as entries:
+            return sum(1 for entry in entries if not entry.name.startswith('.'))
+    except FileNotFoundError:
+        return 0
+
+def load_job_entry(job_id, state_file, stats_file):
+    """Build the active or completed job entry for a job directory"""
+    state = read_job_state(state_file)
+    stats = read_job_stats(stats_file)
+    
+    # Determine if job is active or completed
+    if state.status == "completed":
+        return True, CompletedJob(
+            id=job_id,
+            url=state.url,
+            date=format_start_date(state.start_time),
+            pages=stats.pages_crawled,
+            resources=stats.resources,
+            links_found=stats.links_found
+        )
     
-    # Reset dictionaries
-    active_jobs = {}
-    completed_jobs = {}
+    # Calculate progress
+    queue_size = len(state.queue)
+    in_progress_size = len(state.in_progress)
+    # Newer state files keep visited URLs in a separate log and store only the count
+    visited_size = state.visited_count if state.visited_count is not None else len(state.visited)
+    total_urls = queue_size + in_progress_size + visited_size
     
-    # Check for job directories
+    progress = 0
+    if total_urls > 0:
+        progress = int((visited_size / total_urls) * 100)
+    
+    return False, ActiveJob(
+        id=job_id,
+        url=state.url,
+        status=state.status or "paused",
+        pages_completed=visited_size,
+        max_pages=MAX_PAGES,
+        progress=progress,
+        last_run=state.last_run
+    )
+
+def decode_job(stale_job):
+    """Build the entry for one changed job, or None if its files can't be decoded"""
+    job_id, mtimes, state_file, stats_file = stale_job
     try:
-        job_dirs = [d for d in glob(f"{OUTPUT_DIR}/*") if os.path.isdir(d)]
+        return job_id, mtimes, load_job_entry(job_id, state_file, stats_file)
+    except Exception as e:
+        logger.error(f"Error loading job {job_id}: {e}")
+        return job_id, mtimes, None
+
+# Job entries keyed by job ID, along with the state/stats mtimes they were built from
+_job_cache = {}
+
+# OUTPUT_DIR's mtime as of the last scan; it changes when a job directory is added or removed
+_jobs_dir_mtime = None
+
+# When the last scan ran (time.monotonic()), so progress written by other workers is picked up
+_jobs_scanned_at = 0.0
+
+# Serializes scans and updates of the job maps across request threads
+_jobs_lock = threading.Lock()
+
+# Load existing job data
+def load_jobs(force=False):
+    """Load existing jobs from the output directory
+    
+    The scan is skipped while OUTPUT_DIR's mtime is unchanged and the last
+    one is under JOBS_RESCAN_INTERVAL seconds old, unless force is set.
+    """
+    global active_jobs, completed_jobs, _job_cache, _jobs_dir_mtime, _jobs_scanned_at
+    
+    with _jobs_lock:
+        try:
+            dir_mtime = os.stat(OUTPUT_DIR).st_mtime_ns
+        except OSError:
+            dir_mtime = None
+        if (not force and dir_mtime is not None and dir_mtime == _jobs_dir_mtime
+                and time.monotonic() - _jobs_scanned_at < JOBS_RESCAN_INTERVAL):
+            return active_jobs, completed_jobs
+        
+        # Build new dictionaries and swap them in at the end, so readers never see a partial scan
+        new_active_jobs = {}
+        new_completed_jobs = {}
+        job_cache = {}
         
-        for job_dir in job_dirs:
-            job_id = os.path.basename(job_dir)
-            state_file = os.path.join(job_dir, "state.json")
-            stats_file = os.path.join(job_dir, "stats.json")
+        # Check for job directories
+        try:
+            with os.scandir(OUTPUT_DIR) as entries:
+                job_dirs = [entry for entry in entries if not entry.name.startswith('.') and entry.is_dir()]
             
-            if os.path.exists(state_file) and os.path.exists(stats_file):
+            job_ids = []
+            stale_jobs = []
+            for job_dir in job_dirs:
+                job_id = job_dir.name
+                state_file = os.path.join(job_dir.path, "state.json")
+                stats_file = os.path.join(job_dir.path, "stats.json")
+                
                 try:
-                    # Load job state
-                    with open(state_file, 'r') as f:
-                        state = json.load(f)
-                    
-                    # Load job stats
-                    with open(stats_file, 'r') as f:
-                        stats = json.load(f)
-                    
-                    # Determine if job is active or completed
-                    if state.get("status") == "completed":
-                        completed_jobs[job_id] = {
-                            "id": job_id,
-                            "url": state.get("url"),
-                            "date": datetime.datetime.fromisoformat(state.get("start_time")).strftime("%Y-%m-%d %H:%M"),
-                            "pages": stats.get("pages_crawled", 0),
-                            "resources": stats.get("resources", {}),
-                            "links_found": stats.get("links_found", 0)
-                        }
-                    else:
-                        # Calculate progress
-                        queue_size = len(state.get("queue", []))
-                        in_progress_size = len(state.get("in_progress", []))
-                        visited_size = len(state.get("visited", []))
-                        total_urls = queue_size + in_progress_size + visited_size
-                        
-                        progress = 0
-                        if total_urls > 0:
-                            progress = int((visited_size / total_urls) * 100)
-                        
-                        active_jobs[job_id] = {
-                            "id": job_id,
-                            "url": state.get("url"),
-                            "status": state.get("status", "paused"),
-                            "pages_completed": visited_size,
-                            "max_pages": MAX_PAGES,
-                            "progress": progress,
-                            "last_run": state.get("last_run")
-                        }
-                except Exception as e:
-                    logger.error(f"Error loading job {job_id}: {e}")
-    except Exception as e:
-        logger.error(f"Error loading jobs: {e}")
-        # In Vercel, this might fail on cold starts, which is fine
-    
-    # Return both dictionaries
-    return active_jobs, completed_jobs
+                    mtimes = (os.stat(state_file).st_mtime_ns, os.stat(stats_file).st_mtime_ns)
+                except OSError:
+                    continue
+                
+                # Only decode jobs whose files changed since the last scan
+                job_ids.append(job_id)
+                cached = _job_cache.get(job_id)
+                if cached is not None and cached[0] == mtimes:
+                    job_cache[job_id] = cached
+                else:
+                    stale_jobs.append((job_id, mtimes, state_file, stats_file))
+            
+            # Read changed jobs concurrently so a cold start overlaps its file I/O
+            if stale_jobs:
+                with ThreadPoolExecutor(max_workers=min(JOB_LOAD_THREADS, len(stale_jobs))) as pool:
+                    for job_id, mtimes, entry in pool.map(decode_job, stale_jobs):
+                        if entry is not None:
+                            job_cache[job_id] = (mtimes, *entry)
+            
+            for job_id in job_ids:
+                if job_id not in job_cache:
+                    continue
+                _, is_completed, job = job_cache[job_id]
+                if is_completed:
+                    new_completed_jobs[job_id] = job
+                else:
+                    new_active_jobs[job_id] = job
+        except Exception as e:
+            logger.error(f"Error loading jobs: {e}")
+            # In Vercel, this might fail on cold starts, which is fine
+        
+        active_jobs = new_active_jobs
+        completed_jobs = new_completed_jobs
+        _job_cache = job_cache
+        _jobs_dir_mtime = dir_mtime
+        _jobs_scanned_at = time.monotonic()
+        
+        # Return both dictionaries
+        return active_jobs, completed_jobs
 
 # Call load_jobs on startup (but not on Vercel cold start which might cause issues)
 if not IS_VERCEL:
     load_jobs()
 
+# One long-lived event loop runs every crawl batch, instead of a new loop per request
+CRAWL_LOOP = uvloop.new_event_loop() if uvloop else asyncio.new_event_loop()
+threading.Thread(target=CRAWL_LOOP.run_forever, name='crawl-loop', daemon=True).start()
+
+def json_response(payload, status=200):
+    """Build a JSON response, encoded with msgspec rather than the stdlib json module"""
+    return app.response_class(msgspec.json.encode(payload), status=status, mimetype='application/json')
+
+def run_batch(crawler):
+    """Run one crawl batch to completion and return its result"""
+    return asyncio.run_coroutine_threadsafe(crawler.process_batch(), CRAWL_LOOP).result()
+
+def index_etag(active, completed):
+    """Fingerprint the index page from the jobs and template it is rendered from
+    
+    Hashes the job entries themselves rather than their file mtimes, since
+    start_crawl and continue_crawl update entries without a rescan.
+    """
+    jobs = msgspec.json.encode((sorted(active.items()), sorted(completed.items())))
+    return xxhash.xxh3_64_hexdigest(jobs + b'%d' % os.stat(INDEX_TEMPLATE).st_mtime_ns)
+
 @app.route('/')
 def index():
     """Render the main page with crawler interface and archives."""
-    print("DEBUG: serverless_api.py index route accessed")
-    logger.info("DEBUG: serverless_api.py index route accessed")
-    
-    # Load completed archives
-    completed_jobs_data = {}
-    active_jobs_data = {}
-    
-    # Get data for completed jobs
-    for job_id, job_data in completed_jobs.items():
-        completed_jobs_data[job_id] = job_data
+    # Pick up jobs started or finished by other workers. Rescans are rate
+    # limited and unchanged jobs come from the cache.
+    load_jobs()
+    with _jobs_lock:
+        # Copies, so other request threads can't change the maps mid-render
+        active, completed = dict(active_jobs), dict(completed_jobs)
     
-    # Get data for active jobs
-    for job_id, job_data in active_jobs.items():
-        active_jobs_data[job_id] = job_data
+    # The page only changes when a job or the template does
+    etag = index_etag(active, completed)
+    if request.if_none_match.contains_weak(etag):
+        response = app.response_class(status=304)
+        response.set_etag(etag, weak=True)
+        return response
     
     # Calculate progress and other stats
     progress = 0
     pages_completed = 0
     
-    print(f"DEBUG: Rendering template 'index.html' with progress={progress}, pages_completed={pages_completed}")
-    print(f"DEBUG: Active jobs: {len(active_jobs)}, Completed jobs: {len(completed_jobs)}")
-    template_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'templates', 'index.html')
-    print(f"DEBUG: Template path being checked: {template_path}")
-    print(f"DEBUG: Template exists: {os.path.exists(template_path)}")
+    logger.debug(f"Rendering index with {len(active)} active and {len(completed)} completed jobs")
     
     # Add current time for cache busting
     now = datetime.datetime.now().strftime('%Y%m%d%H%M%S')
     
-    return render_template(
+    response = app.make_response(render_template(
         'index.html',
-        active_jobs=active_jobs_data,
-        completed_jobs=completed_jobs_data,
+        active_jobs=active,
+        completed_jobs=completed,
         progress=progress,
         pages_completed=pages_completed,
         now=now,
         disclaimer=DISCLAIMER
-    )
+    ))
+    response.set_etag(etag, weak=True)
+    return response
 
 @app.route('/start_crawl', methods=['POST'])
 def start_crawl():
     """Start a new crawl job"""
     url = request.form.get('url')
     if not url:
-        return jsonify({"error": "URL is required"}), 400
+        return json_response({"error": "URL is required"}, 400)
     
     try:
         # Create a new job ID
@@ -183,25 +369,23 @@ def start_crawl():
             max_depth=MAX_DEPTH
         )
         
-        # Run the first batch asynchronously
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        result = loop.run_until_complete(crawler.process_batch())
-        loop.close()
+        # Run the first batch
+        result = run_batch(crawler)
         
         # Add to active jobs
-        active_jobs[job_id] = {
-            "id": job_id,
-            "url": url,
-            "status": "started",
-            "pages_completed": crawler.state["pages_crawled"],
-            "max_pages": MAX_PAGES,
-            "progress": int((crawler.state["pages_crawled"] / MAX_PAGES) * 100) if MAX_PAGES > 0 else 0,
-            "last_run": datetime.datetime.now().isoformat()
-        }
+        with _jobs_lock:
+            active_jobs[job_id] = ActiveJob(
+                id=job_id,
+                url=url,
+                status="started",
+                pages_completed=crawler.state["pages_crawled"],
+                max_pages=MAX_PAGES,
+                progress=page_progress(crawler.state["pages_crawled"]),
+                last_run=datetime.datetime.now().isoformat()
+            )
         
         # Return job information
-        return jsonify({
+        return json_response({
             "job_id": job_id,
             "url": url,
             "status": "started",
@@ -210,13 +394,16 @@ def start_crawl():
     
     except Exception as e:
         logger.error(f"Error starting crawl: {e}")
-        return jsonify({"error": str(e)}), 500
+        return json_response({"error": str(e)}, 500)
 
-@app.route('/api/continue_crawl/<job_id>', methods=['POST'])
+@app.route('/api/continue_crawl/<job_id:job_id>', methods=['POST'])
 def continue_crawl(job_id):
     """Continue a previously started crawl job"""
     if job_id not in active_jobs:
-        return jsonify({"error": "Job not found"}), 404
+        # The job may have been started by another worker
+        load_jobs(force=True)
+        if job_id not in active_jobs:
+            return json_response({"error": "Job not found"}, 404)
     
     try:
         # Get job output directory
@@ -224,15 +411,12 @@ def continue_crawl(job_id):
         state_file = os.path.join(output_dir, "state.json")
         
         if not os.path.exists(state_file):
-            return jsonify({"error": "Job state not found"}), 404
+            return json_response({"error": "Job state not found"}, 404)
         
         # Load state to get the original URL
-        with open(state_file, 'r') as f:
-            state = json.load(f)
-        
-        url = state.get("url")
+        url = read_job_state(state_file).url
         if not url:
-            return jsonify({"error": "URL not found in job state"}), 400
+            return json_response({"error": "URL not found in job state"}, 400)
         
         # Continue crawling
         crawler = ServerlessCrawler(
@@ -243,42 +427,40 @@ def continue_crawl(job_id):
             max_depth=MAX_DEPTH
         )
         
-        # Run the next batch asynchronously
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        result = loop.run_until_complete(crawler.process_batch())
-        loop.close()
+        # Run the next batch
+        result = run_batch(crawler)
         
         # Update job status
         job_status = "running"
-        if result.get("status") == "completed":
-            job_status = "completed"
-            
-            # Move from active to completed
-            if job_id in active_jobs:
-                job_data = active_jobs[job_id]
-                completed_jobs[job_id] = {
-                    "id": job_id,
-                    "url": url,
-                    "date": datetime.datetime.now().strftime("%Y-%m-%d %H:%M"),
-                    "crawled_count": crawler.state["pages_crawled"],
-                    "resources": crawler.state["resources_downloaded"],
-                    "links_found": len(crawler.state["links_found"])
-                }
-                del active_jobs[job_id]
-        else:
-            # Update active job info
-            active_jobs[job_id] = {
-                "id": job_id,
-                "url": url,
-                "status": job_status,
-                "pages_completed": crawler.state["pages_crawled"],
-                "max_pages": MAX_PAGES,
-                "progress": int((crawler.state["pages_crawled"] / MAX_PAGES) * 100) if MAX_PAGES > 0 else 0,
-                "last_run": datetime.datetime.now().isoformat()
-            }
+        with _jobs_lock:
+            _job_cache.pop(job_id, None)
+            if result.get("status") == "completed":
+                job_status = "completed"
+                
+                # Move from active to completed
+                if job_id in active_jobs:
+                    completed_jobs[job_id] = CompletedJob(
+                        id=job_id,
+                        url=url,
+                        date=datetime.datetime.now().strftime("%Y-%m-%d %H:%M"),
+                        pages=crawler.state["pages_crawled"],
+                        resources=crawler.state["resources_downloaded"],
+                        links_found=len(crawler.state["links_found"])
+                    )
+                    del active_jobs[job_id]
+            else:
+                # Update active job info
+                active_jobs[job_id] = ActiveJob(
+                    id=job_id,
+                    url=url,
+                    status=job_status,
+                    pages_completed=crawler.state["pages_crawled"],
+                    max_pages=MAX_PAGES,
+                    progress=page_progress(crawler.state["pages_crawled"]),
+                    last_run=datetime.datetime.now().isoformat()
+                )
         
-        return jsonify({
+        return json_response({
             "job_id": job_id,
             "status": job_status,
             "result": result
@@ -286,18 +468,18 @@ def continue_crawl(job_id):
     
     except Exception as e:
         logger.error(f"Error continuing crawl for job {job_id}: {e}")
-        return jsonify({"error": str(e)}), 500
+        return json_response({"error": str(e)}, 500)
 
-@app.route('/api/job_status/<job_id>')
+@app.route('/api/job_status/<job_id:job_id>')
 def job_status(job_id):
     """Get the status of a job"""
     # Check active jobs first
     if job_id in active_jobs:
-        return jsonify(active_jobs[job_id])
+        return json_response(active_jobs[job_id])
     
     # Then check completed jobs
     if job_id in completed_jobs:
-        return jsonify(completed_jobs[job_id])
+        return json_response(completed_jobs[job_id])
     
     # Try to load from disk if not in memory
     output_dir = os.path.join(OUTPUT_DIR, job_id)
@@ -306,27 +488,24 @@ def job_status(job_id):
     
     if os.path.exists(state_file) and os.path.exists(stats_file):
         try:
-            with open(state_file, 'r') as f:
-                state = json.load(f)
-            
-            with open(stats_file, 'r') as f:
-                stats = json.load(f)
+            state = read_job_state(state_file)
+            stats = read_job_stats(stats_file)
             
-            return jsonify({
+            return json_response({
                 "id": job_id,
-                "url": state.get("url"),
-                "status": state.get("status"),
-                "pages_completed": stats.get("pages_crawled", 0),
+                "url": state.url,
+                "status": state.status,
+                "pages_completed": stats.pages_crawled,
                 "max_pages": MAX_PAGES,
-                "progress": int((stats.get("pages_crawled", 0) / MAX_PAGES) * 100) if MAX_PAGES > 0 else 0,
-                "last_run": state.get("last_run")
+                "progress": page_progress(stats.pages_crawled),
+                "last_run": state.last_run
             })
         except Exception as e:
             logger.error(f"Error loading job status for {job_id}: {e}")
     
-    return jsonify({"error": "Job not found"}), 404
+    return json_response({"error": "Job not found"}, 404)
 
-@app.route('/view/<job_id>')
+@app.route('/view/<job_id:job_id>')
 def view_archive(job_id):
     """View the results of a crawl"""
     # Check if job exists
@@ -340,31 +519,24 @@ def view_archive(job_id):
     
     try:
         # Load state and stats
-        with open(state_file, 'r') as f:
-            state = json.load(f)
-        
-        with open(stats_file, 'r') as f:
-            stats = json.load(f)
+        state = read_job_state(state_file)
+        stats = read_job_stats(stats_file)
         
         # Get list of HTML files
-        html_files = []
-        if os.path.exists(html_dir):
-            html_files = [os.path.basename(f) for f in glob(f"{html_dir}/*.html")]
+        html_files = [name for name in list_dir_names(html_dir) if name.endswith(".html")]
         
         # Count resources
         resource_counts = {
-            "css": len(glob(f"{output_dir}/css/*")),
-            "js": len(glob(f"{output_dir}/js/*")),
-            "images": len(glob(f"{output_dir}/images/*")),
-            "fonts": len(glob(f"{output_dir}/fonts/*"))
+            resource_type: count_dir_entries(os.path.join(output_dir, resource_type))
+            for resource_type in RESOURCE_TYPES
         }
         
         return render_template('archive.html', 
                               job_id=job_id,
-                              url=state.get("url", "Unknown URL"),
-                              date=datetime.datetime.fromisoformat(state.get("start_time")).strftime("%Y-%m-%d %H:%M"),
-                              pages_crawled=stats.get("pages_crawled", 0),
-                              links_found=stats.get("links_found", 0),
+                              url=state.url or "Unknown URL",
+                              date=format_start_date(state.start_time),
+                              pages_crawled=stats.pages_crawled,
+                              links_found=stats.links_found,
                               resource_counts=resource_counts,
                               html_files=html_files,
                               disclaimer=DISCLAIMER)
@@ -373,166 +545,185 @@ def view_archive(job_id):
         logger.error(f"Error viewing archive {job_id}: {e}")
         return render_template('error.html', message=f"Error loading archive: {str(e)}")
 
-@app.route('/api/clean_job/<job_id>', methods=['POST'])
+@app.route('/api/clean_job/<job_id:job_id>', methods=['POST'])
 def clean_job(job_id):
     """Remove a job and its files"""
     # Check if job exists
     output_dir = os.path.join(OUTPUT_DIR, job_id)
     
     if not os.path.exists(output_dir):
-        return jsonify({"error": "Job not found"}), 404
+        return json_response({"error": "Job not found"}, 404)
     
     try:
         # Remove from tracking dictionaries
-        if job_id in active_jobs:
-            del active_jobs[job_id]
-        
-        if job_id in completed_jobs:
-            del completed_jobs[job_id]
+        with _jobs_lock:
+            active_jobs.pop(job_id, None)
+            completed_jobs.pop(job_id, None)
+            _job_cache.pop(job_id, None)
         
-        # Remove directory and all contents
-        import shutil
+        # Remove directory and all contents; a later crawler for this job must recreate them
+        ServerlessCrawler.forget_directories(output_dir)
         shutil.rmtree(output_dir)
         
-        return jsonify({"success": True, "message": f"Job {job_id} removed"})
+        return json_response({"success": True, "message": f"Job {job_id} removed"})
     
     except Exception as e:
         logger.error(f"Error cleaning job {job_id}: {e}")
-        return jsonify({"error": str(e)}), 500
+        return json_response({"error": str(e)}, 500)
 
-@app.route('/job/<job_id>/<path:resource_path>')
+@app.route('/job/<job_id:job_id>/<path:resource_path>')
 def serve_job_file(job_id, resource_path):
     """Serve a file from the job directory"""
     job_dir = os.path.join(OUTPUT_DIR, job_id)
-    return send_from_directory(job_dir, resource_path)
+    return send_from_directory(job_dir, resource_path, conditional=True)
 
 @app.route('/static/<path:path>')
 def serve_static(path):
     """Serve static files"""
-    print(f"DEBUG: Serving static file: {path}")
-    static_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
-    print(f"DEBUG: Static directory: {static_dir}")
-    return send_from_directory(static_dir, path)
+    return send_from_directory(STATIC_DIR, path, conditional=True)
 
 @app.route('/favicon.ico')
 def favicon():
     """Serve favicon directly"""
-    print("DEBUG: Serving favicon.ico")
-    return send_from_directory(os.path.join(app.root_path, 'static'), 'favicon.ico')
+    return send_from_directory(STATIC_DIR, 'favicon.ico', conditional=True)
 
-@app.route('/api/resources/<resource_type>/<job_id>')
+@app.route('/api/resources/<resource_type>/<job_id:job_id>')
 def list_resources(resource_type, job_id):
     """List resources of a specific type for a job"""
     # Validate resource type
-    if resource_type not in ['css', 'js', 'images', 'fonts']:
-        return jsonify({"error": "Invalid resource type"}), 400
+    if resource_type not in RESOURCE_TYPE_SET:
+        return json_response({"error": "Invalid resource type"}, 400)
     
     # Check if job exists
     output_dir = os.path.join(OUTPUT_DIR, job_id)
     if not os.path.exists(output_dir):
-        return jsonify({"error": "Job not found"}), 404
+        return json_response({"error": "Job not found"}, 404)
     
     # Get resource directory path
     resource_dir = os.path.join(output_dir, resource_type)
     
-    # Check if resource directory exists
-    if not os.path.exists(resource_dir):
-        return jsonify({"files": []}), 200
-    
-    # List files in the directory
+    # List files in the directory (a missing directory just has no files)
     try:
-        files = [os.path.basename(f) for f in glob(f"{resource_dir}/*")]
-        return jsonify({"files": files})
+        files = list_dir_names(resource_dir)
+        return json_response({"files": files})
     except Exception as e:
         logger.error(f"Error listing resources: {e}")
-        return jsonify({"error": str(e)}), 500
+        return json_response({"error": str(e)}, 500)
+
+@app.route('/api/resources/<job_id:job_id>')
+def list_all_resources(job_id):
+    """List every resource type for a job in one response, streamed a type at a time"""
+    output_dir = os.path.join(OUTPUT_DIR, job_id)
+    if not os.path.exists(output_dir):
+        return json_response({"error": "Job not found"}, 404)
+    
+    def generate():
+        separator = b'{'
+        for resource_type in RESOURCE_TYPES:
+            files = list_dir_names(os.path.join(output_dir, resource_type))
+            yield separator + msgspec.json.encode(resource_type) + b':' + msgspec.json.encode(files)
+            separator = b','
+        yield b'}'
+    
+    return app.response_class(generate(), mimetype='application/json')
+
+# Static page content; these pages never depend on the request
+ABOUT_CONTENT = {
+    "title": "About Crawlr",
+    "description": "Crawlr is a serverless web archiving tool designed to capture websites for educational and personal use.",
+    "features": [
+        "Captures entire websites including HTML, CSS, JavaScript, images and fonts",
+        "Works within serverless constraints by processing sites in small batches",
+        "Archives content in a browsable, organized structure",
+        "Allows you to view and download resources for further use"
+    ],
+    "usage": [
+        "Enter a URL to begin crawling a website",
+        "The crawler will process pages in batches (due to serverless constraints)",
+        "Use 'Continue Crawl' buttons to process larger sites in multiple steps",
+        "View completed archives to browse the captured content",
+        "Download or copy files for use in your development environment"
+    ],
+    "ide_instructions": [
+        "All archived files maintain their relative paths and relationships",
+        "HTML files are stored in the 'html' directory",
+        "CSS files are stored in the 'css' directory",
+        "JavaScript files are stored in the 'js' directory",
+        "Images and fonts are stored in their respective directories",
+        "Copy these files to your IDE or development environment maintaining the same structure",
+        "Open the HTML files in your browser to view the archived content"
+    ]
+}
+
+IDE_CONTENT = {
+    "title": "Using Crawlr Output in Your IDE",
+    "description": "Crawlr organizes archived websites in a way that makes them easy to import and use in any IDE or code editor.",
+    "general_instructions": [
+        "After crawling a website, click on 'View Details' to browse the archived content",
+        "Navigate through the HTML, CSS, JS, and other resources",
+        "Click on any file to view its contents in your browser",
+        "Copy the code or download the files to use in your IDE"
+    ],
+    "ides": [
+        {
+            "name": "VS Code",
+            "steps": [
+                "Create a new folder for your project",
+                "Inside this folder, create subfolders: html, css, js, images, fonts",
+                "Copy the HTML files from Crawlr to your html folder",
+                "Copy CSS, JS, and other resources to their respective folders",
+                "Open the folder in VS Code using File > Open Folder",
+                "Start editing the files to customize the site to your needs"
+            ]
+        },
+        {
+            "name": "Sublime Text",
+            "steps": [
+                "Create a project folder with the same structure as the Crawlr output",
+                "Copy files from Crawlr to their respective folders",
+                "Use Project > Add Folder to Project to include the entire folder",
+                "Edit the files while maintaining the same relative paths"
+            ]
+        },
+        {
+            "name": "JetBrains IDEs (PyCharm, WebStorm, etc.)",
+            "steps": [
+                "Create a new project and select an empty template",
+                "Create the same folder structure as Crawlr output",
+                "Copy the files from Crawlr to your project",
+                "JetBrains IDEs will automatically recognize HTML, CSS, and JS files",
+                "Use the built-in preview features to test your changes"
+            ]
+        }
+    ],
+    "tips": [
+        "Always maintain the same folder structure to preserve file references",
+        "Use relative paths (e.g., '../css/style.css') rather than absolute paths",
+        "If you encounter missing resources, check if they were properly copied",
+        "Use your IDE's search feature to find and modify specific elements or styles",
+        "Most IDEs have live preview features to see your changes in real-time"
+    ]
+}
+
+STATIC_PAGES = {
+    'about.html': {"content": ABOUT_CONTENT, "disclaimer": DISCLAIMER},
+    'ide_usage.html': {"content": IDE_CONTENT}
+}
+
+@lru_cache(maxsize=None)
+def render_static_page(template_name, script_root):
+    """Render a static page once; script_root keys the cache because url_for depends on it"""
+    return render_template(template_name, **STATIC_PAGES[template_name])
 
 @app.route('/about')
 def about():
     """About page with information and instructions"""
-    about_content = {
-        "title": "About Crawlr",
-        "description": "Crawlr is a serverless web archiving tool designed to capture websites for educational and personal use.",
-        "features": [
-            "Captures entire websites including HTML, CSS, JavaScript, images and fonts",
-            "Works within serverless constraints by processing sites in small batches",
-            "Archives content in a browsable, organized structure",
-            "Allows you to view and download resources for further use"
-        ],
-        "usage": [
-            "Enter a URL to begin crawling a website",
-            "The crawler will process pages in batches (due to serverless constraints)",
-            "Use 'Continue Crawl' buttons to process larger sites in multiple steps",
-            "View completed archives to browse the captured content",
-            "Download or copy files for use in your development environment"
-        ],
-        "ide_instructions": [
-            "All archived files maintain their relative paths and relationships",
-            "HTML files are stored in the 'html' directory",
-            "CSS files are stored in the 'css' directory",
-            "JavaScript files are stored in the 'js' directory",
-            "Images and fonts are stored in their respective directories",
-            "Copy these files to your IDE or development environment maintaining the same structure",
-            "Open the HTML files in your browser to view the archived content"
-        ]
-    }
-    return render_template('about.html', 
-                          content=about_content,
-                          disclaimer=DISCLAIMER)
+    return render_static_page('about.html', request.script_root)
 
 @app.route('/ide-usage')
 def ide_usage():
     """Page explaining how to use Crawlr output in different IDEs"""
-    ide_content = {
-        "title": "Using Crawlr Output in Your IDE",
-        "description": "Crawlr organizes archived websites in a way that makes them easy to import and use in any IDE or code editor.",
-        "general_instructions": [
-            "After crawling a website, click on 'View Details' to browse the archived content",
-            "Navigate through the HTML, CSS, JS, and other resources",
-            "Click on any file to view its contents in your browser",
-            "Copy the code or download the files to use in your IDE"
-        ],
-        "ides": [
-            {
-                "name": "VS Code",
-                "steps": [
-                    "Create a new folder for your project",
-                    "Inside this folder, create subfolders: html, css, js, images, fonts",
-                    "Copy the HTML files from Crawlr to your html folder",
-                    "Copy CSS, JS, and other resources to their respective folders",
-                    "Open the folder in VS Code using File > Open Folder",
-                    "Start editing the files to customize the site to your needs"
-                ]
-            },
-            {
-                "name": "Sublime Text",
-                "steps": [
-                    "Create a project folder with the same structure as the Crawlr output",
-                    "Copy files from Crawlr to their respective folders",
-                    "Use Project > Add Folder to Project to include the entire folder",
-                    "Edit the files while maintaining the same relative paths"
-                ]
-            },
-            {
-                "name": "JetBrains IDEs (PyCharm, WebStorm, etc.)",
-                "steps": [
-                    "Create a new project and select an empty template",
-                    "Create the same folder structure as Crawlr output",
-                    "Copy the files from Crawlr to your project",
-                    "JetBrains IDEs will automatically recognize HTML, CSS, and JS files",
-                    "Use the built-in preview features to test your changes"
-                ]
-            }
-        ],
-        "tips": [
-            "Always maintain the same folder structure to preserve file references",
-            "Use relative paths (e.g., '../css/style.css') rather than absolute paths",
-            "If you encounter missing resources, check if they were properly copied",
-            "Use your IDE's search feature to find and modify specific elements or styles",
-            "Most IDEs have live preview features to see your changes in real-time"
-        ]
-    }
-    return render_template('ide_usage.html', content=ide_content)
+    return render_static_page('ide_usage.html', request.script_root)
 
 # Add debug information to the main function
 if __name__ == "__main__":
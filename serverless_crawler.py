@@ -3,23 +3,125 @@ import os
 import time
 import asyncio
 import aiohttp
+import aiofiles
+import xxhash
 from urllib.parse import urljoin, urlparse
-from bs4 import BeautifulSoup
+from selectolax.lexbor import LexborHTMLParser
 import logging
 import uuid
+from functools import lru_cache
+from collections import deque
 from src.utils import CrawlerStats
 import re
 from datetime import datetime
+from email.utils import formatdate
+
+try:
+    import orjson
+except ImportError:  # Fall back to the standard library serializer
+    orjson = None
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Elements whose URLs a page pulls in, and the attribute holding each resource URL
+LINKED_NODES_SELECTOR = 'a[href], link[href], script[src], img[src], style'
+RESOURCE_ATTRIBUTES = {'link': 'href', 'script': 'src', 'img': 'src'}
+
+SKIP_EXTENSIONS = ('.pdf', '.zip', '.exe', '.dmg', '.tar.gz')  # Never crawled
+# Resource type by MIME type, then by file extension when the MIME type is unknown
+MIME_RESOURCE_TYPES = {
+    'text/css': 'css',
+    'application/javascript': 'js',
+    'text/javascript': 'js',
+    'application/x-javascript': 'js',
+    'font/woff': 'fonts',
+    'font/woff2': 'fonts',
+    'font/ttf': 'fonts',
+    'font/otf': 'fonts',
+    'application/font-woff': 'fonts',
+    'application/vnd.ms-fontobject': 'fonts',
+}
+EXTENSION_RESOURCE_TYPES = {
+    '.css': 'css',
+    '.js': 'js',
+    '.jpg': 'images', '.jpeg': 'images', '.png': 'images', '.gif': 'images', '.svg': 'images', '.webp': 'images',
+    '.woff': 'fonts', '.woff2': 'fonts', '.ttf': 'fonts', '.eot': 'fonts', '.otf': 'fonts',
+}
+FONT_URL_RE = re.compile(r'url\([\'"]?(.*?\.(?:woff2?|ttf|eot))[\'"]?\)')  # Font URLs in inline CSS
+UNSAFE_FILENAME_RE = re.compile(r'[^\w\-\.]')
+DOWNLOAD_CHUNK_SIZE = 64 * 1024  # bytes
+SESSION_CONNECTION_LIMIT = 10  # Open connections shared by all batches
+DNS_CACHE_TTL = 300  # seconds
+KEEPALIVE_TIMEOUT = 60  # seconds an idle connection waits for the next batch
+ABSOLUTE_URL_PREFIXES = ('http://', 'https://')
+VALID_URL_CACHE_SIZE = 65536  # URL decisions kept by is_crawlable_url
+URL_LOG_KEYS = ("visited", "links_found")  # State sets stored as append-only NDJSON logs
+
+def join_url(base, href):
+    """Resolve href against base like urljoin, without parsing hrefs that are already absolute."""
+    # urljoin only changes an absolute URL when it has dot segments or tabs/newlines to strip
+    if href.startswith(ABSOLUTE_URL_PREFIXES) and '/.' not in href and href.isprintable():
+        return href
+    return urljoin(base, href)
+
+# Links repeat across the pages of a site, so decisions are cached per URL and domain
+@lru_cache(maxsize=VALID_URL_CACHE_SIZE)
+def is_crawlable_url(url, domain):
+    """Check if a URL on the given domain should be crawled."""
+    try:
+        parsed_url = urlparse(url)
+        
+        # Skip fragment-only URLs
+        if not parsed_url.netloc and not parsed_url.path and parsed_url.fragment:
+            return False
+        
+        # Skip external domains
+        if parsed_url.netloc and parsed_url.netloc != domain:
+            return False
+        
+        # Skip certain file types
+        if url.endswith(SKIP_EXTENSIONS):
+            return False
+        
+        return True
+    except Exception:
+        return False
+
+# One ClientSession per event loop, kept open so batches reuse connections and DNS lookups
+_shared_session = None
+_shared_session_loop = None
+
+async def get_shared_session():
+    """Return the ClientSession for the running loop, creating it on first use."""
+    global _shared_session, _shared_session_loop
+    loop = asyncio.get_running_loop()
+    if _shared_session is None or _shared_session.closed or _shared_session_loop is not loop:
+        connector = aiohttp.TCPConnector(
+            limit=SESSION_CONNECTION_LIMIT,
+            ttl_dns_cache=DNS_CACHE_TTL,
+            keepalive_timeout=KEEPALIVE_TIMEOUT
+        )
+        _shared_session = aiohttp.ClientSession(connector=connector)
+        _shared_session_loop = loop
+    return _shared_session
+
+async def close_shared_session():
+    """Close the shared ClientSession, if one is open."""
+    global _shared_session
+    if _shared_session is not None and not _shared_session.closed:
+        await _shared_session.close()
+    _shared_session = None
+
 class ServerlessCrawler:
     """
     A crawler designed to work in serverless environments with timeout constraints.
     This crawler is designed to be called multiple times, processing a batch of URLs each time.
     """
     
+    # Output directories whose subdirectories this process has already created
+    _ready_dirs = set()
+    
     def __init__(self, base_url, job_id=None, output_dir=None, max_pages=100, max_depth=3):
         self.base_url = base_url
         self.domain = urlparse(base_url).netloc
@@ -34,6 +136,12 @@ class ServerlessCrawler:
         self.js_dir = os.path.join(self.output_dir, "js")
         self.images_dir = os.path.join(self.output_dir, "images")
         self.fonts_dir = os.path.join(self.output_dir, "fonts")
+        self.resource_dirs = {
+            "css": self.css_dir,
+            "js": self.js_dir,
+            "images": self.images_dir,
+            "fonts": self.fonts_dir
+        }
         self.stats_file = os.path.join(self.output_dir, "stats.json")
         self.state_file = os.path.join(self.output_dir, "state.json")
         
@@ -60,13 +168,21 @@ class ServerlessCrawler:
             "last_run": None
         }
         
-        # Convert sets back from lists in loaded state
-        if isinstance(self.state["visited"], list):
-            self.state["visited"] = set(self.state["visited"])
+        # Convert the queue and sets back from lists in loaded state
+        self.state["queue"] = deque(self.state["queue"])
+        # Mirrors the queue so membership checks don't scan it
+        self.queued = set(self.state["queue"])
         if isinstance(self.state["in_progress"], list):
             self.state["in_progress"] = set(self.state["in_progress"])
-        if isinstance(self.state["links_found"], list):
-            self.state["links_found"] = set(self.state["links_found"])
+        
+        # Sets that only grow are kept in append-only logs instead of state.json
+        self.url_logs = {key: os.path.join(self.output_dir, f"{key}.ndjson") for key in URL_LOG_KEYS}
+        self.logged_urls = {}
+        for key, path in self.url_logs.items():
+            self.logged_urls[key] = self._read_url_log(path)
+            # Older state files still carry the full list
+            self.state[key] = set(self.state.get(key, ()))
+            self.state[key].update(self.logged_urls[key])
         
         # Setup logging
         logging.basicConfig(
@@ -77,18 +193,28 @@ class ServerlessCrawler:
     
     def _ensure_directories(self):
         """Ensure all required directories exist."""
+        # A crawler is built per batch; only the first one for a job needs to create them
+        if self.output_dir in ServerlessCrawler._ready_dirs:
+            return
         for directory in [self.output_dir, self.html_dir, self.css_dir, 
                           self.js_dir, self.images_dir, self.fonts_dir]:
             os.makedirs(directory, exist_ok=True)
+        ServerlessCrawler._ready_dirs.add(self.output_dir)
+    
+    @classmethod
+    def forget_directories(cls, output_dir):
+        """Drop a job's directories from the ready set, e.g. once they have been deleted."""
+        cls._ready_dirs.discard(output_dir)
     
     def _load_state(self):
         """Load crawler state from state.json if it exists."""
         if os.path.exists(self.state_file):
             try:
-                with open(self.state_file, 'r') as f:
-                    return json.load(f)
+                with open(self.state_file, 'rb') as f:
+                    data = f.read()
+                return orjson.loads(data) if orjson else json.loads(data)
             except json.JSONDecodeError:
-                self.logger.error(f"Failed to load state file: {self.state_file}")
+                logger.error(f"Failed to load state file: {self.state_file}")
                 return None
         return None
     
@@ -96,13 +222,19 @@ class ServerlessCrawler:
         """Save the current state to the state file."""
         # Convert sets to lists for JSON serialization
         state_copy = self.state.copy()
-        state_copy["visited"] = list(self.state["visited"])
+        state_copy["queue"] = list(self.state["queue"])
         state_copy["in_progress"] = list(self.state["in_progress"])
-        state_copy["links_found"] = list(self.state["links_found"])
         state_copy["last_run"] = datetime.now().isoformat()
         
-        with open(self.state_file, 'w') as f:
-            json.dump(state_copy, f, indent=2)
+        # Only URLs added since the last save are appended to the logs
+        for key in URL_LOG_KEYS:
+            del state_copy[key]
+            new_urls = self.state[key] - self.logged_urls[key]
+            self._append_url_log(self.url_logs[key], new_urls)
+            self.logged_urls[key].update(new_urls)
+        state_copy["visited_count"] = len(self.state["visited"])
+        
+        self._write_json(self.state_file, state_copy)
         
         # Also save stats
         self.save_stats()
@@ -121,8 +253,50 @@ class ServerlessCrawler:
             "errors": len(self.state["errors"])
         }
         
-        with open(self.stats_file, 'w') as f:
-            json.dump(stats, f, indent=2)
+        self._write_json(self.stats_file, stats)
+    
+    def _read_url_log(self, path):
+        """Read the set of URLs recorded in an NDJSON log."""
+        urls = set()
+        try:
+            with open(path, 'rb+') as f:
+                offset = 0
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        # A last line cut short by an interrupted write; drop it
+                        # so the next append starts on a fresh line
+                        f.truncate(offset)
+                        break
+                    offset += len(line)
+                    try:
+                        urls.add(orjson.loads(line) if orjson else json.loads(line))
+                    except ValueError:
+                        continue
+        except FileNotFoundError:
+            pass
+        return urls
+    
+    def _append_url_log(self, path, urls):
+        """Append URLs to an NDJSON log, one JSON string per line."""
+        if not urls:
+            return
+        if orjson:
+            lines = b"".join(orjson.dumps(url) + b"\n" for url in urls)
+        else:
+            lines = "".join(json.dumps(url) + "\n" for url in urls).encode()
+        with open(path, 'ab') as f:
+            f.write(lines)
+    
+    def _write_json(self, path, data):
+        """Write JSON to a temporary file and swap it in, so readers never see a partial file."""
+        tmp_path = path + ".tmp"
+        if orjson:
+            with open(tmp_path, 'wb') as f:
+                f.write(orjson.dumps(data))
+        else:
+            with open(tmp_path, 'w') as f:
+                json.dump(data, f)
+        os.replace(tmp_path, path)
     
     async def process_batch(self, batch_size=5, timeout=8):
         """Process a batch of URLs from the queue, respecting the server's execution time."""
@@ -130,8 +304,8 @@ class ServerlessCrawler:
             self.logger.info("Crawl already completed, nothing to process")
             return {"status": "completed", "message": "Crawl already completed"}
         
+        # State is saved once, when the batch finishes
         self.state["status"] = "running"
-        self.save_state()
         
         start_time = time.time()
         processed_count = 0
@@ -139,7 +313,8 @@ class ServerlessCrawler:
         
         # Get URLs from queue (up to batch_size)
         while len(batch) < batch_size and self.state["queue"]:
-            url = self.state["queue"].pop(0)
+            url = self.state["queue"].popleft()
+            self.queued.discard(url)
             if url not in self.state["visited"] and url not in self.state["in_progress"]:
                 batch.append(url)
                 self.state["in_progress"].add(url)
@@ -152,47 +327,62 @@ class ServerlessCrawler:
         
         self.logger.info(f"Processing batch of {len(batch)} URLs")
         
-        async with aiohttp.ClientSession() as session:
-            tasks = []
-            for url in batch:
-                if self.state["pages_crawled"] >= self.max_pages:
-                    self.logger.info(f"Reached max pages limit: {self.max_pages}")
-                    break
-                
-                tasks.append(self.process_url(session, url))
-            
-            # Wait for all tasks or until timeout
-            try:
-                done, pending = await asyncio.wait(
-                    tasks, 
-                    timeout=timeout,
-                    return_when=asyncio.ALL_COMPLETED
-                )
-                
-                # Process results from completed tasks
-                for task in done:
-                    try:
-                        result = task.result()
-                        if result:
-                            processed_count += 1
-                    except Exception as e:
-                        self.state["errors"].append(str(e))
-                        self.logger.error(f"Error processing URL: {e}")
-                
-                # Mark pending tasks for retry
-                for task in pending:
-                    task.cancel()
-                    # The URLs for pending tasks will remain in in_progress
-                    # and will be retried in the next batch
+        session = await get_shared_session()
+        deadline = time.monotonic() + timeout
+        pending = set()
+        for url in batch:
+            if self.state["pages_crawled"] >= self.max_pages:
+                self.logger.info(f"Reached max pages limit: {self.max_pages}")
+                break
             
-            except asyncio.TimeoutError:
+            pending.add(asyncio.ensure_future(self.process_url(session, url)))
+        
+        # Handle results as they arrive and keep batch_size requests in flight
+        # until the queue drains or the time budget runs out
+        while pending:
+            remaining_time = deadline - time.monotonic()
+            if remaining_time <= 0:
                 self.logger.warning("Timeout reached while processing batch")
+                break
+            
+            done, pending = await asyncio.wait(
+                pending,
+                timeout=remaining_time,
+                return_when=asyncio.FIRST_COMPLETED
+            )
+            
+            # Process results from completed tasks
+            for task in done:
+                try:
+                    result = task.result()
+                    if result:
+                        processed_count += 1
+                except Exception as e:
+                    self.state["errors"].append(str(e))
+                    self.logger.error(f"Error processing URL: {e}")
+            
+            # Start queued URLs, including ones just discovered, in the freed slots
+            while (len(pending) < batch_size and self.state["queue"] and
+                   self.state["pages_crawled"] < self.max_pages):
+                url = self.state["queue"].popleft()
+                self.queued.discard(url)
+                if url not in self.state["visited"] and url not in self.state["in_progress"]:
+                    self.state["in_progress"].add(url)
+                    pending.add(asyncio.ensure_future(self.process_url(session, url)))
+        
+        # Cancel anything still running. Those URLs remain in in_progress
+        # and will be retried in the next batch
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
         
         # Move any remaining in_progress URLs back to the queue
         remaining = list(self.state["in_progress"])
         for url in remaining:
-            if url not in self.state["visited"] and url not in self.state["queue"]:
+            if url not in self.state["visited"] and url not in self.queued:
                 self.state["queue"].append(url)
+                self.queued.add(url)
         self.state["in_progress"] = set()
         
         elapsed_time = time.time() - start_time
@@ -221,28 +411,56 @@ class ServerlessCrawler:
             
             self.logger.info(f"Processing URL: {url}")
             
-            # Determine file paths
             filename = self._get_filename_from_url(url)
-            output_path = os.path.join(self.html_dir, filename)
+            
+            # A resource saved by an earlier run of this job whose state was never
+            # saved (e.g. a batch cut off by the platform) only needs revalidating
+            resource_type, resource_dir = self._classify_resource(url, '')
+            saved_path = os.path.join(resource_dir, filename)
+            headers = None
+            try:
+                headers = {'If-Modified-Since': formatdate(os.path.getmtime(saved_path), usegmt=True)}
+            except OSError:
+                saved_path = None
             
             # Download the page content
-            async with session.get(url, timeout=5) as response:
+            async with session.get(url, timeout=5, headers=headers) as response:
+                if response.status == 304 and saved_path:
+                    if resource_type in self.state["resources_downloaded"]:
+                        self.state["resources_downloaded"][resource_type] += 1
+                    self.state["in_progress"].discard(url)
+                    self.state["visited"].add(url)
+                    return True
+                
                 if response.status != 200:
                     self.logger.warning(f"Failed to fetch {url}: Status {response.status}")
                     self.state["errors"].append(f"HTTP {response.status} for {url}")
+                    # Reading a short error body lets the connection go back to the pool
+                    if response.content_length is not None and response.content_length <= DOWNLOAD_CHUNK_SIZE:
+                        await response.read()
                     self.state["in_progress"].discard(url)
                     self.state["visited"].add(url)
                     return False
                 
                 content_type = response.headers.get('Content-Type', '')
                 
-                if 'text/html' in content_type:
+                # URLs with a known resource extension are never parsed as pages
+                if resource_type == 'other' and 'text/html' in content_type:
                     # Process HTML content
                     html_content = await response.text()
                     
-                    # Save the original HTML
-                    with open(output_path, 'w', encoding='utf-8') as f:
-                        f.write(html_content)
+                    # Save the original HTML without blocking the loop, swapping it
+                    # into place so an interrupted write never leaves a partial page
+                    output_path = os.path.join(self.html_dir, filename)
+                    part_path = output_path + ".part"
+                    try:
+                        async with aiofiles.open(part_path, 'w', encoding='utf-8') as f:
+                            await f.write(html_content)
+                        os.replace(part_path, output_path)
+                    except BaseException:
+                        if os.path.exists(part_path):
+                            os.remove(part_path)
+                        raise
                     
                     # Parse HTML for links and resources
                     await self._process_html(url, html_content)
@@ -269,93 +487,91 @@ class ServerlessCrawler:
     async def _process_html(self, url, html_content):
         """Process HTML content to extract links and resources."""
         try:
-            soup = BeautifulSoup(html_content, 'html.parser')
+            tree = LexborHTMLParser(html_content)
             page_links = set()
+            resource_urls = []
             
-            # Process links (a tags)
-            for a_tag in soup.find_all('a', href=True):
-                href = a_tag['href']
-                absolute_url = urljoin(url, href)
+            # One pass over the tree collects links, resources and style blocks
+            for node in tree.css(LINKED_NODES_SELECTOR):
+                tag = node.tag
                 
-                # Only follow links within the same domain
-                if self._is_valid_url(absolute_url):
-                    page_links.add(absolute_url)
-                    self.state["links_found"].add(absolute_url)
+                if tag == 'a':
+                    href = node.attributes['href'] or ''
+                    absolute_url = join_url(url, href)
                     
-                    # Add to queue if we haven't visited or queued yet
-                    if (absolute_url not in self.state["visited"] and 
-                        absolute_url not in self.state["in_progress"] and
-                        absolute_url not in self.state["queue"]):
-                        self.state["queue"].append(absolute_url)
-            
-            # Process CSS, JS, images
-            for tag, attr, resource_type in [
-                ('link', 'href', 'css'),  # CSS files
-                ('script', 'src', 'js'),  # JavaScript files
-                ('img', 'src', 'images')  # Images
-            ]:
-                for element in soup.find_all(tag, **{attr: True}):
-                    resource_url = element.get(attr)
-                    if not resource_url or resource_url.startswith('data:'):
-                        continue
+                    # Only follow links within the same domain
+                    if self._is_valid_url(absolute_url):
+                        page_links.add(absolute_url)
+                        self.state["links_found"].add(absolute_url)
                         
-                    absolute_resource_url = urljoin(url, resource_url)
-                    
-                    # Add to queue with lower priority (append to end)
-                    if (absolute_resource_url not in self.state["visited"] and 
-                        absolute_resource_url not in self.state["in_progress"] and
-                        absolute_resource_url not in self.state["queue"]):
-                        self.state["queue"].append(absolute_resource_url)
+                        # Add to queue if we haven't visited or queued yet
+                        self._enqueue(absolute_url)
+                
+                elif tag == 'style':
+                    style_content = node.text()
+                    # Most style blocks reference no URLs; skip the regex for those
+                    if style_content and 'url(' in style_content:
+                        # Extract font URLs from CSS using regex
+                        resource_urls.extend(FONT_URL_RE.findall(style_content))
+                
+                else:
+                    # CSS, JS and images
+                    resource_url = node.attributes[RESOURCE_ATTRIBUTES[tag]]
+                    if resource_url and not resource_url.startswith('data:'):
+                        resource_urls.append(resource_url)
             
-            # Process font files in CSS
-            for style_tag in soup.find_all('style'):
-                style_content = style_tag.string
-                if style_content:
-                    # Extract font URLs from CSS using regex
-                    font_urls = re.findall(r'url\([\'"]?(.*?\.(?:woff2?|ttf|eot))[\'"]?\)', style_content)
-                    for font_url in font_urls:
-                        absolute_font_url = urljoin(url, font_url)
-                        if (absolute_font_url not in self.state["visited"] and 
-                            absolute_font_url not in self.state["in_progress"] and
-                            absolute_font_url not in self.state["queue"]):
-                            self.state["queue"].append(absolute_font_url)
+            # Add resources to queue with lower priority (after the page links)
+            for resource_url in resource_urls:
+                self._enqueue(join_url(url, resource_url))
             
         except Exception as e:
             self.logger.error(f"Error parsing HTML from {url}: {str(e)}")
             self.state["errors"].append(f"Error parsing HTML from {url}: {str(e)}")
     
+    def _enqueue(self, url):
+        """Queue a URL unless it has already been visited, started or queued."""
+        if (url not in self.state["visited"] and
+            url not in self.state["in_progress"] and
+            url not in self.queued):
+            self.state["queue"].append(url)
+            self.queued.add(url)
+    
     async def _handle_resource(self, url, response, content_type):
         """Handle downloading of non-HTML resources."""
-        resource_type = 'other'
-        output_dir = self.output_dir
-        
-        # Determine resource type and directory
-        if 'text/css' in content_type or url.endswith('.css'):
-            resource_type = 'css'
-            output_dir = self.css_dir
-        elif 'javascript' in content_type or url.endswith('.js'):
-            resource_type = 'js'
-            output_dir = self.js_dir
-        elif 'image/' in content_type or any(url.endswith(ext) for ext in ['.jpg', '.jpeg', '.png', '.gif', '.svg', '.webp']):
-            resource_type = 'images'
-            output_dir = self.images_dir
-        elif any(url.endswith(ext) for ext in ['.woff', '.woff2', '.ttf', '.eot', '.otf']):
-            resource_type = 'fonts'
-            output_dir = self.fonts_dir
+        resource_type, output_dir = self._classify_resource(url, content_type)
         
         # Generate filename
         filename = self._get_filename_from_url(url)
         output_path = os.path.join(output_dir, filename)
         
-        # Download and save the resource
-        content = await response.read()
-        with open(output_path, 'wb') as f:
-            f.write(content)
+        # Stream the resource to a temporary file so a failed download leaves nothing behind
+        part_path = output_path + ".part"
+        try:
+            async with aiofiles.open(part_path, 'wb') as f:
+                async for chunk in response.content.iter_chunked(DOWNLOAD_CHUNK_SIZE):
+                    await f.write(chunk)
+            os.replace(part_path, output_path)
+        except BaseException:
+            if os.path.exists(part_path):
+                os.remove(part_path)
+            raise
         
         # Update stats
         if resource_type in self.state["resources_downloaded"]:
             self.state["resources_downloaded"][resource_type] += 1
     
+    def _classify_resource(self, url, content_type):
+        """Return the resource type and output directory for a URL and its Content-Type."""
+        mime_type = content_type.split(';', 1)[0].strip().lower()
+        resource_type = MIME_RESOURCE_TYPES.get(mime_type)
+        if resource_type is None:
+            if mime_type.startswith('image/'):
+                resource_type = 'images'
+            else:
+                extension = os.path.splitext(urlparse(url).path)[1].lower()
+                resource_type = EXTENSION_RESOURCE_TYPES.get(extension, 'other')
+        return resource_type, self.resource_dirs.get(resource_type, self.output_dir)
+    
     def _get_filename_from_url(self, url):
         """Generate a filename from a URL, preserving extension."""
         parsed_url = urlparse(url)
@@ -372,12 +588,13 @@ class ServerlessCrawler:
         
         # Add query parameters to filename if they exist
         if parsed_url.query:
-            query_hash = str(hash(parsed_url.query))[-8:]
+            # xxh3 is stable across processes, unlike the randomized builtin hash()
+            query_hash = xxhash.xxh3_64_hexdigest(parsed_url.query.encode())[:8]
             base, ext = os.path.splitext(filename)
             filename = f"{base}_{query_hash}{ext}"
         
         # Ensure filename is valid
-        filename = re.sub(r'[^\w\-\.]', '_', filename)
+        filename = UNSAFE_FILENAME_RE.sub('_', filename)
         
         # If no extension, add .html for pages
         if '.' not in filename:
@@ -387,24 +604,7 @@ class ServerlessCrawler:
     
     def _is_valid_url(self, url):
         """Check if a URL should be crawled (same domain and not a fragment)."""
-        try:
-            parsed_url = urlparse(url)
-            
-            # Skip fragment-only URLs
-            if not parsed_url.netloc and not parsed_url.path and parsed_url.fragment:
-                return False
-            
-            # Skip external domains
-            if parsed_url.netloc and parsed_url.netloc != self.domain:
-                return False
-            
-            # Skip certain file types
-            if any(url.endswith(ext) for ext in ['.pdf', '.zip', '.exe', '.dmg', '.tar.gz']):
-                return False
-            
-            return True
-        except Exception:
-            return False
+        return is_crawlable_url(url, self.domain)
 
 async def run_crawler(base_url, job_id=None, output_dir=None, max_pages=100):
     """Run the crawler for a single batch of URLs."""
@@ -426,5 +626,6 @@ if __name__ == "__main__":
     
     loop = asyncio.get_event_loop()
     result = loop.run_until_complete(run_crawler(url, job_id, max_pages=max_pages))
+    loop.run_until_complete(close_shared_session())
     
     print(json.dumps(result, indent=2)) 
\ No newline at end of file
@@ -18,11 +18,14 @@ import asyncio
 import logging
 import hashlib
 import urllib.robotparser
+from functools import lru_cache
+from collections import deque
 from datetime import datetime
 from typing import Dict, List, Set, Any, Optional, Tuple
 from urllib.parse import urlparse, urljoin, urldefrag
 
 import aiohttp
+import xxhash
 from bs4 import BeautifulSoup
 import validators
 from markdownify import markdownify
@@ -32,7 +35,53 @@ from aiohttp import ClientTimeout, TCPConnector
 from aiohttp.client_exceptions import ClientError
 
 from .utils import normalize_url, extract_domain, CrawlerStats, ResourceExtractor
-from .renderer import JSRenderer
+from .renderer import JavaScriptRenderer
+
+# Prefer the C-backed lxml parsers, falling back to the standard library ones
+try:
+    from lxml import etree as lxml_etree
+    HTML_PARSER = 'lxml'
+except ImportError:
+    lxml_etree = None
+    HTML_PARSER = 'html.parser'
+
+try:
+    import orjson
+except ImportError:  # Fall back to the standard library serializer
+    orjson = None
+
+try:
+    import charset_normalizer
+except ImportError:  # Undeclared charsets are then assumed to be UTF-8
+    charset_normalizer = None
+
+# Concurrent connections allowed to a single host
+MAX_REQUESTS_PER_HOST = 2
+
+# Seconds a robots.txt fetch that failed transiently (timeout, 5xx) is
+# reused before it is retried
+ROBOTS_RETRY_TTL = 5 * 60
+
+# Seconds resolved host addresses are reused
+DNS_CACHE_TTL = 300
+
+# Size of the chunks page and sitemap bodies are read in
+READ_CHUNK_SIZE = 64 * 1024
+
+# Seconds a whole sitemap download may take, however steadily bytes arrive
+SITEMAP_FETCH_TIMEOUT = 120
+
+# Bytes read from a single sitemap (the protocol's 50 MiB limit)
+SITEMAP_MAX_BYTES = 50 * 1024 * 1024
+
+# Pages crawled between checkpoints of the content cache
+CONTENT_CACHE_SAVE_INTERVAL = 50
+
+# XML namespace of sitemap and sitemap index elements
+SITEMAP_NS = '{http://www.sitemaps.org/schemas/sitemap/0.9}'
+
+# Page fields stored in per-URL cache files rather than the content cache index
+PAGE_PAYLOAD_FIELDS = ("html", "text", "links", "images", "schema_data")
 
 # Configure logging
 logging.basicConfig(
@@ -41,6 +90,52 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Maximum number of URLs whose parse results are memoized
+URL_PARSE_CACHE_SIZE = 8192
+
+@lru_cache(maxsize=URL_PARSE_CACHE_SIZE)
+def cached_urlparse(url: str):
+    """urlparse with memoized results; the returned tuple is immutable and safe to share."""
+    return urlparse(url)
+
+@lru_cache(maxsize=URL_PARSE_CACHE_SIZE)
+def cached_urldefrag(url: str):
+    """urldefrag with memoized results."""
+    return urldefrag(url)
+
+def decode_body(body: bytes, charset: Optional[str]) -> str:
+    """Decode a page body read in chunks.
+    
+    Without a declared charset, falls back to detection the way aiohttp's
+    get_encoding() does, which needs the whole body from response.read().
+    Detection only runs when the body is not valid UTF-8.
+    """
+    if charset:
+        try:
+            return body.decode(charset, errors='replace')
+        except LookupError:  # Unknown charset name
+            pass
+    try:
+        return body.decode('utf-8')
+    except UnicodeDecodeError:
+        pass
+    if charset_normalizer is not None:
+        match = charset_normalizer.from_bytes(bytes(body)).best()
+        if match is not None:
+            return body.decode(match.encoding, errors='replace')
+    return body.decode('utf-8', errors='replace')
+
+def new_sitemap_parser():
+    """Create an incremental XML parser that reports each element once it is complete."""
+    if lxml_etree is not None:
+        # Crawled sitemaps are untrusted, so never expand entities
+        return lxml_etree.XMLPullParser(events=('end',), resolve_entities=False)
+    # ElementTree has no parent links, so also report 'start' to learn the root
+    return ET.XMLPullParser(events=('start', 'end'))
+
+# Raised by either parser on malformed XML
+SITEMAP_PARSE_ERRORS = (ET.ParseError, lxml_etree.ParseError) if lxml_etree is not None else (ET.ParseError,)
+
 class WebsiteCrawler:
     """Asynchronous website crawler with advanced features."""
     
@@ -65,6 +160,7 @@ class WebsiteCrawler:
             max_file_size: Maximum file size to download (in bytes)
             max_concurrent_requests: Maximum number of concurrent requests
             min_request_interval: Minimum interval between requests to same domain (in seconds)
+            robots_ttl: Seconds a fetched (or missing) robots.txt is reused before refetching
         """
         # Crawler settings
         self.max_pages = kwargs.get('max_pages', 100)
@@ -83,6 +179,7 @@ class WebsiteCrawler:
         self.max_file_size = kwargs.get('max_file_size', 10 * 1024 * 1024)  # 10MB
         self.max_concurrent_requests = kwargs.get('max_concurrent_requests', 5)
         self.min_request_interval = kwargs.get('min_request_interval', 1.0)
+        self.robots_ttl = kwargs.get('robots_ttl', 6 * 60 * 60)  # 6 hours
         
         # Ensure cache directory exists
         os.makedirs(self.cache_dir, exist_ok=True)
@@ -90,7 +187,8 @@ class WebsiteCrawler:
         # State variables
         self.crawled_urls = set()        # URLs that have been processed
         self.failed_urls = set()         # URLs that failed to process
-        self.url_queue = []              # Queue of URLs to process
+        self.url_queue = deque()         # Queue of URLs to process
+        self.enqueued_urls = set()       # URLs that have ever been added to the queue
         self.results = {                 # Results of the crawl
             "pages": {},
             "metadata": {
@@ -113,112 +211,235 @@ class WebsiteCrawler:
         
         # Robots.txt parsers
         self.robots_parsers = {}          # Cache for robots.txt parsers
+        self.robots_cache = self._load_robots_cache()  # robots.txt text (None if unavailable) and fetch time per domain
         
-        # Content cache for diffing
+        # Content cache for diffing; full page payloads live in one file per URL
+        self.pages_cache_dir = os.path.join(self.cache_dir, "pages")
         self.content_cache = self._load_content_cache()
+        self.content_cache_dirty = False  # Whether content_cache has changes not yet on disk
+        self.page_payloads = {}           # Payloads not yet written to disk (all of them without track_changes)
         
-        # Domain specific semaphores for rate limiting
-        self.domain_semaphores = {}
-        
-        # Global semaphore for concurrent requests
-        self.request_semaphore = asyncio.Semaphore(self.max_concurrent_requests)
+        # HTTP session, created on first use and kept open until close()
+        self._session = None
         
         # Initialize JS renderer if needed
         self.js_rendering = kwargs.get('js_rendering', False)
         if self.js_rendering:
-            self.renderer = JSRenderer()
+            self.renderer = JavaScriptRenderer()
         
         # Initialize resource extractor
         self.resource_extractor = ResourceExtractor(kwargs.get('base_url', ""), kwargs.get('output_dir', "./output"))
     
+    async def __aenter__(self):
+        """Open the HTTP session, keeping it across crawl() calls until context exit."""
+        self._get_session()
+        return self
+    
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        """Close the HTTP session on context exit."""
+        await self.close()
+    
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Return the shared HTTP session, creating it on first use."""
+        if self._session is None or self._session.closed:
+            # The connector enforces the global and per-host concurrency limits
+            connector = TCPConnector(
+                limit=self.max_concurrent_requests,
+                limit_per_host=MAX_REQUESTS_PER_HOST,
+                ttl_dns_cache=DNS_CACHE_TTL
+            )
+            # Socket-level timeouts, since a total or connect timeout would also
+            # count the time a request waits for one of the per-host connections
+            timeout = ClientTimeout(total=None, sock_connect=self.timeout, sock_read=self.timeout)
+            self._session = aiohttp.ClientSession(timeout=timeout, connector=connector)
+        return self._session
+    
+    async def close(self) -> None:
+        """Close the HTTP session, if one is open."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+    
     def _load_content_cache(self) -> Dict[str, Dict[str, Any]]:
         """Load content cache from disk."""
         cache_file = os.path.join(self.cache_dir, "content_cache.json")
         if os.path.exists(cache_file):
             try:
-                with open(cache_file, 'r') as f:
-                    return json.load(f)
-            except (json.JSONDecodeError, IOError) as e:
+                with open(cache_file, 'rb') as f:
+                    data = f.read()
+                cache = orjson.loads(data) if orjson else json.loads(data)
+            except (ValueError, IOError) as e:
                 logger.warning(f"Error loading content cache: {e}. Starting with empty cache.")
                 return {}
+            return self._migrate_legacy_keys(cache)
         return {}
     
+    def _migrate_legacy_keys(self, cache: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """Re-key entries written by older versions, which used MD5 URL keys."""
+        migrated = {}
+        for key, entry in cache.items():
+            if len(key) == 32 and entry.get("url"):  # MD5 hex digest
+                # An entry already stored under the new key is more recent
+                migrated.setdefault(self.compute_url_hash(entry["url"]), entry)
+            else:
+                migrated[key] = entry
+        return migrated
+    
     def _save_content_cache(self) -> None:
         """Save content cache to disk."""
         cache_file = os.path.join(self.cache_dir, "content_cache.json")
+        for url_hash, payload in self.page_payloads.items():
+            self._save_page_payload(url_hash, payload)
+        self.page_payloads.clear()
         try:
-            with open(cache_file, 'w') as f:
-                json.dump(self.content_cache, f)
+            self._write_json(cache_file, self.content_cache)
+            self.content_cache_dirty = False
         except IOError as e:
             logger.error(f"Error saving content cache: {e}")
     
-    async def fetch_robots_txt(self, base_url: str, session: aiohttp.ClientSession) -> Optional[urllib.robotparser.RobotFileParser]:
+    def _load_robots_cache(self) -> Dict[str, Dict[str, Any]]:
+        """Load cached robots.txt files from disk."""
+        cache_file = os.path.join(self.cache_dir, "robots_cache.json")
+        if os.path.exists(cache_file):
+            try:
+                with open(cache_file, 'rb') as f:
+                    data = f.read()
+                return orjson.loads(data) if orjson else json.loads(data)
+            except (ValueError, IOError) as e:
+                logger.warning(f"Error loading robots cache: {e}. Starting with empty cache.")
+                return {}
+        return {}
+    
+    def _save_robots_cache(self) -> None:
+        """Save cached robots.txt files to disk."""
+        cache_file = os.path.join(self.cache_dir, "robots_cache.json")
+        try:
+            self._write_json(cache_file, self.robots_cache)
+        except IOError as e:
+            logger.error(f"Error saving robots cache: {e}")
+    
+    def _page_cache_path(self, url_hash: str) -> str:
+        """Path of the cached page payload for a URL hash."""
+        return os.path.join(self.pages_cache_dir, url_hash[:2], f"{url_hash}.json")
+    
+    def _has_page_payload(self, url_hash: str) -> bool:
+        """Whether a 304 for this URL hash could be answered from a cached payload."""
+        if url_hash in self.page_payloads or "html" in self.content_cache[url_hash]:
+            return True
+        return os.path.exists(self._page_cache_path(url_hash))
+    
+    def _load_page_payload(self, url_hash: str) -> Optional[Dict[str, Any]]:
+        """Load the cached html, text, links, images and schema data for a URL hash."""
+        if url_hash in self.page_payloads:
+            return self.page_payloads[url_hash]
+        try:
+            with open(self._page_cache_path(url_hash), 'rb') as f:
+                data = f.read()
+            return orjson.loads(data) if orjson else json.loads(data)
+        except (ValueError, IOError):
+            return None
+    
+    def _save_page_payload(self, url_hash: str, payload: Dict[str, Any]) -> None:
+        """Save a page payload to its own cache file."""
+        path = self._page_cache_path(url_hash)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            self._write_json(path, payload)
+        except (IOError, TypeError, ValueError) as e:  # orjson.JSONEncodeError is a TypeError
+            logger.error(f"Error saving cached page {path}: {e}")
+    
+    def _write_json(self, path: str, data: Any) -> None:
+        """Write JSON to a temporary file and swap it into place."""
+        tmp_path = path + ".tmp"
+        if orjson:
+            with open(tmp_path, 'wb') as f:
+                f.write(orjson.dumps(data))
+        else:
+            with open(tmp_path, 'w') as f:
+                json.dump(data, f)
+        os.replace(tmp_path, path)
+    
+    async def fetch_robots_txt(self, base_url: str) -> Optional[urllib.robotparser.RobotFileParser]:
         """Fetch and parse robots.txt for a given domain."""
-        # Check if we already have a parser for this domain
-        if base_url in self.robots_parsers:
+        # Reuse a recent result for this domain, including a failed fetch
+        cache_entry = self.robots_cache.get(base_url)
+        ttl = ROBOTS_RETRY_TTL if cache_entry and cache_entry.get("transient") else self.robots_ttl
+        if cache_entry and time.time() - cache_entry["fetched_at"] < ttl:
+            if base_url not in self.robots_parsers:
+                self.robots_parsers[base_url] = self._parse_robots_txt(cache_entry["robots_txt"])
             return self.robots_parsers[base_url]
         
         # Parse the base URL to get the domain
-        parsed_url = urlparse(base_url)
+        parsed_url = cached_urlparse(base_url)
         domain = f"{parsed_url.scheme}://{parsed_url.netloc}"
         robots_url = f"{domain}/robots.txt"
         
+        # Only a definitive answer (2xx, or 4xx meaning there is no robots.txt)
+        # is kept for the full TTL; timeouts and server errors are retried soon
+        robots_txt = None
+        transient = False
         try:
-            async with session.get(robots_url, timeout=self.timeout) as response:
+            # The session only bounds each socket read, so cap the whole fetch too
+            timeout = ClientTimeout(total=self.timeout, sock_connect=self.timeout, sock_read=self.timeout)
+            async with self._get_session().get(robots_url, timeout=timeout) as response:
                 if response.status == 200:
                     robots_txt = await response.text()
-                    parser = urllib.robotparser.RobotFileParser()
-                    parser.parse(robots_txt.splitlines())
-                    self.robots_parsers[base_url] = parser
-                    return parser
                 else:
                     logger.warning(f"Failed to fetch robots.txt: {response.status}")
-                    return None
+                    transient = not 400 <= response.status < 500
         except Exception as e:
             logger.error(f"Error fetching robots.txt: {str(e)}")
+            transient = True
+        
+        self.robots_cache[base_url] = {"robots_txt": robots_txt, "fetched_at": time.time(), "transient": transient}
+        self.robots_parsers[base_url] = self._parse_robots_txt(robots_txt)
+        return self.robots_parsers[base_url]
+    
+    def _parse_robots_txt(self, robots_txt: Optional[str]) -> Optional[urllib.robotparser.RobotFileParser]:
+        """Build a parser for robots.txt text, or None if there was none."""
+        if robots_txt is None:
             return None
+        parser = urllib.robotparser.RobotFileParser()
+        parser.parse(robots_txt.splitlines())
+        return parser
     
-    async def is_allowed_by_robots(self, url: str, session: aiohttp.ClientSession) -> bool:
+    async def is_allowed_by_robots(self, url: str) -> bool:
         """Check if a URL is allowed by robots.txt."""
         if not self.respect_robots_txt:
             return True
             
-        parsed_url = urlparse(url)
+        parsed_url = cached_urlparse(url)
         domain = f"{parsed_url.scheme}://{parsed_url.netloc}"
         
-        parser = await self.fetch_robots_txt(domain, session)
+        parser = await self.fetch_robots_txt(domain)
         if parser:
             return parser.can_fetch(self.user_agent, url)
             
         # If we couldn't fetch robots.txt, assume allowed
         return True
     
-    async def get_domain_semaphore(self, domain: str) -> asyncio.Semaphore:
-        """Get or create a semaphore for rate limiting a specific domain."""
-        if domain not in self.domain_semaphores:
-            # Allow up to 2 concurrent requests per domain
-            self.domain_semaphores[domain] = asyncio.Semaphore(2)
-        return self.domain_semaphores[domain]
-    
     async def delay_if_needed(self, domain: str) -> None:
         """Implement rate limiting for a domain."""
         current_time = time.time()
         
+        # Claim the next free slot before sleeping, so concurrent requests
+        # to the same domain stay min_request_interval apart
+        request_time = current_time
         if domain in self.domain_last_request:
-            elapsed = current_time - self.domain_last_request[domain]
-            if elapsed < self.min_request_interval:
-                delay = self.min_request_interval - elapsed
-                logger.debug(f"Rate limiting: Waiting {delay:.2f}s before next request to {domain}")
-                await asyncio.sleep(delay)
+            request_time = max(current_time, self.domain_last_request[domain] + self.min_request_interval)
+        self.domain_last_request[domain] = request_time
         
-        self.domain_last_request[domain] = time.time()
+        delay = request_time - current_time
+        if delay > 0:
+            logger.debug(f"Rate limiting: Waiting {delay:.2f}s before next request to {domain}")
+            await asyncio.sleep(delay)
     
-    async def fetch_sitemap(self, base_url: str, session: aiohttp.ClientSession) -> List[str]:
+    async def fetch_sitemap(self, base_url: str) -> List[str]:
         """Fetch and parse sitemap to discover pages."""
-        urls = []
+        urls = set()
         
         # Parse the base URL to get the domain
-        parsed_url = urlparse(base_url)
+        parsed_url = cached_urlparse(base_url)
         domain = f"{parsed_url.scheme}://{parsed_url.netloc}"
         
         sitemap_candidates = [
@@ -228,55 +449,140 @@ class WebsiteCrawler:
         ]
         
         # Try to find robots.txt first
-        robots_parser = await self.fetch_robots_txt(domain, session)
+        robots_parser = await self.fetch_robots_txt(domain)
         if robots_parser and hasattr(robots_parser, 'sitemaps'):
             sitemap_candidates = robots_parser.sitemaps + sitemap_candidates
         
+        # Sitemaps already read, so index files that list each other can't loop
+        seen_sitemaps = set()
+        
         # Try each potential sitemap URL
         for sitemap_url in sitemap_candidates:
-            try:
-                domain_semaphore = await self.get_domain_semaphore(domain)
-                async with domain_semaphore:
-                    await self.delay_if_needed(domain)
-                    async with session.get(sitemap_url, timeout=self.timeout) as response:
-                        if response.status == 200:
-                            sitemap_content = await response.text()
-                            
-                            # Parse the XML
-                            try:
-                                root = ET.fromstring(sitemap_content)
-                                # Handle sitemap index files
-                                if root.tag.endswith('sitemapindex'):
-                                    for sitemap in root.findall('.//{http://www.sitemaps.org/schemas/sitemap/0.9}sitemap'):
-                                        loc = sitemap.find('.//{http://www.sitemaps.org/schemas/sitemap/0.9}loc')
-                                        if loc is not None and loc.text:
-                                            sub_urls = await self.fetch_sitemap(loc.text, session)
-                                            urls.extend(sub_urls)
-                                # Handle regular sitemaps
-                                else:
-                                    for url_elem in root.findall('.//{http://www.sitemaps.org/schemas/sitemap/0.9}url'):
-                                        loc = url_elem.find('.//{http://www.sitemaps.org/schemas/sitemap/0.9}loc')
-                                        if loc is not None and loc.text:
-                                            urls.append(loc.text)
-                                
-                                logger.info(f"Sitemap found at {sitemap_url}: {len(urls)} URLs")
-                                # If we found a valid sitemap, we can stop searching
-                                if urls:
-                                    break
-                            except ET.ParseError as e:
-                                logger.warning(f"Error parsing sitemap XML at {sitemap_url}: {e}")
-            except Exception as e:
-                logger.warning(f"Error fetching sitemap {sitemap_url}: {str(e)}")
+            await self._read_sitemap(sitemap_url, domain, urls, seen_sitemaps)
+            
+            # If we found a valid sitemap, we can stop searching
+            if urls:
+                break
+        
+        return list(urls)
+    
+    async def _read_sitemap(self, sitemap_url: str, domain: str, urls: Set[str], seen_sitemaps: Set[str]) -> None:
+        """Stream one sitemap into urls, following the entries of sitemap index files."""
+        if sitemap_url in seen_sitemaps:
+            return
+        seen_sitemaps.add(sitemap_url)
+        
+        page_urls = []
+        child_sitemaps = []
+        try:
+            await self.delay_if_needed(domain)
+            timeout = ClientTimeout(total=SITEMAP_FETCH_TIMEOUT, sock_connect=self.timeout, sock_read=self.timeout)
+            async with self._get_session().get(sitemap_url, timeout=timeout) as response:
+                if response.status != 200:
+                    return
+                
+                # Parse the XML as it arrives instead of buffering the whole document
+                parser = new_sitemap_parser()
+                root = None
+                bytes_read = 0
+                try:
+                    async for chunk in response.content.iter_chunked(READ_CHUNK_SIZE):
+                        bytes_read += len(chunk)
+                        if bytes_read > SITEMAP_MAX_BYTES:
+                            # Keep the entries parsed so far and stop reading
+                            logger.warning(f"Sitemap at {sitemap_url} exceeds {SITEMAP_MAX_BYTES} bytes, truncating")
+                            break
+                        parser.feed(chunk)
+                        root = self._collect_sitemap_locs(parser.read_events(), page_urls, child_sitemaps, root)
+                    else:
+                        parser.close()
+                        self._collect_sitemap_locs(parser.read_events(), page_urls, child_sitemaps, root)
+                except SITEMAP_PARSE_ERRORS as e:
+                    logger.warning(f"Error parsing sitemap XML at {sitemap_url}: {e}")
+                    return
+                
+                logger.info(f"Sitemap found at {sitemap_url}: {len(page_urls)} URLs")
+        except Exception as e:
+            logger.warning(f"Error fetching sitemap {sitemap_url}: {str(e)}")
+            return
+        
+        urls.update(page_urls)
+        
+        # Handle sitemap index files
+        for child_url in child_sitemaps:
+            await self._read_sitemap(child_url, domain, urls, seen_sitemaps)
+    
+    def _collect_sitemap_locs(self, events, page_urls: List[str], child_sitemaps: List[str],
+                              root: Optional[Any] = None) -> Optional[Any]:
+        """Sort the <loc> of each completed <url> or <sitemap> element, then free the element.
+        
+        Returns the document root once an ElementTree parser has reported it,
+        to be passed back in with the next events.
+        """
+        for event, element in events:
+            if event == 'start':
+                if root is None:
+                    root = element
+                continue
+            
+            if element.tag == f"{SITEMAP_NS}url":
+                target = page_urls
+            elif element.tag == f"{SITEMAP_NS}sitemap":
+                target = child_sitemaps
+            else:
+                continue
+            
+            loc = element.find(f".//{SITEMAP_NS}loc")
+            if loc is not None and loc.text:
+                target.append(loc.text.strip())
+            
+            # Empty the element and drop it (and anything before it) from the
+            # tree, so memory stays flat however many entries the sitemap has
+            element.clear()
+            if lxml_etree is not None:
+                while element.getprevious() is not None:
+                    del element.getparent()[0]
+            elif root is not None:
+                root.clear()
+        
+        return root
+    
+    def _collect_nodes(self, soup: BeautifulSoup) -> Dict[str, List[Any]]:
+        """Collect the tags fetch_url extracts from in a single walk over the tree."""
+        nodes = {"p": [], "a": [], "img": [], "ld_json": [], "itemscope": []}
         
-        # Return unique URLs
-        return list(set(urls))
+        for element in soup.descendants:
+            name = element.name
+            if name is None:  # Text, comments and other strings
+                continue
+            
+            if name == 'p' or name == 'img':
+                nodes[name].append(element)
+            elif name == 'a':
+                if element.get('href') is not None:
+                    nodes["a"].append(element)
+            elif name == 'script':
+                if element.get('type') == 'application/ld+json':
+                    nodes["ld_json"].append(element)
+            
+            if element.has_attr('itemscope'):
+                nodes["itemscope"].append(element)
+        
+        return nodes
+    
+    async def extract_schema_org_data(self, soup: BeautifulSoup, url: str,
+                                      nodes: Optional[Dict[str, List[Any]]] = None) -> List[Dict[str, Any]]:
+        """Extract schema.org structured data from a page, reusing nodes from _collect_nodes if given."""
+        if nodes is None:
+            nodes = self._collect_nodes(soup)
+        return self._extract_schema_from_nodes(nodes, url)
     
-    async def extract_schema_org_data(self, soup: BeautifulSoup, url: str) -> List[Dict[str, Any]]:
-        """Extract schema.org structured data from a page."""
+    def _extract_schema_from_nodes(self, nodes: Dict[str, List[Any]], url: str) -> List[Dict[str, Any]]:
+        """Extract schema.org structured data from the JSON-LD and itemscope nodes of a page."""
         schema_data = []
         
         # Look for JSON-LD
-        for script in soup.find_all('script', type='application/ld+json'):
+        for script in nodes["ld_json"]:
             try:
                 data = json.loads(script.string)
                 schema_data.append(data)
@@ -285,8 +591,7 @@ class WebsiteCrawler:
         
         # Look for microdata
         # This is a simplistic implementation that could be expanded
-        items = soup.find_all(itemscope=True)
-        for item in items:
+        for item in nodes["itemscope"]:
             try:
                 item_type = item.get('itemtype', '')
                 if not item_type:
@@ -322,11 +627,16 @@ class WebsiteCrawler:
     
     def compute_content_hash(self, content: str) -> str:
         """Compute a hash of the content for diffing."""
-        return hashlib.sha256(content.encode('utf-8')).hexdigest()
+        # Only used to spot changes, so a fast non-cryptographic hash is enough
+        return xxhash.xxh3_128_hexdigest(content.encode('utf-8'))
+    
+    def compute_url_hash(self, url: str) -> str:
+        """Compute the content cache key for a URL."""
+        return xxhash.xxh3_64_hexdigest(url.encode('utf-8'))
     
     def detect_content_changes(self, url: str, content_hash: str, content: str) -> Dict[str, Any]:
         """Detect changes in content since last crawl."""
-        url_hash = hashlib.md5(url.encode('utf-8')).hexdigest()
+        url_hash = self.compute_url_hash(url)
         
         result = {
             "is_changed": True,
@@ -337,8 +647,13 @@ class WebsiteCrawler:
         if url_hash in self.content_cache:
             cache_entry = self.content_cache[url_hash]
             
+            # Entries from older versions hold a SHA-256 content hash
+            cached_hash = cache_entry["content_hash"]
+            if len(cached_hash) == 64 and cached_hash == hashlib.sha256(content.encode('utf-8')).hexdigest():
+                cached_hash = content_hash
+            
             # Check if content hash changed
-            if cache_entry["content_hash"] == content_hash:
+            if cached_hash == content_hash:
                 result["is_changed"] = False
                 result["first_seen"] = cache_entry["first_seen"]
                 result["last_changed"] = cache_entry["last_changed"]
@@ -349,6 +664,7 @@ class WebsiteCrawler:
                 # TODO: Implement more detailed diffing here if needed
         
         # Update cache
+        self.content_cache_dirty = True
         self.content_cache[url_hash] = {
             "url": url,
             "content_hash": content_hash,
@@ -358,14 +674,92 @@ class WebsiteCrawler:
         
         return result
     
-    async def fetch_url(self, url: str, depth: int, session: aiohttp.ClientSession) -> Dict[str, Any]:
+    def _parse_page(self, html: str, url: str, base_netloc: str) -> Dict[str, Any]:
+        """Parse a page and extract its title, text, links, images and schema.org data."""
+        # Parse the HTML
+        soup = BeautifulSoup(html, HTML_PARSER)
+        
+        # Extract information
+        title = soup.title.text.strip() if soup.title else ""
+        nodes = self._collect_nodes(soup)
+        
+        # Extract text content
+        paragraphs = [text for text in (p.text.strip() for p in nodes["p"]) if text]
+        text_content = "\n\n".join(paragraphs)
+        
+        # Extract links
+        links = []
+        for a in nodes["a"]:
+            href = a['href']
+            if href.startswith('javascript:') or href.startswith('#'):
+                continue
+                
+            # Make relative URLs absolute
+            absolute_url = urljoin(url, href)
+            
+            # Skip mailto and tel links
+            if absolute_url.startswith(('mailto:', 'tel:')):
+                continue
+                
+            # Parse the URL to check if it's valid
+            try:
+                parsed = cached_urlparse(absolute_url)
+                if not parsed.scheme or not parsed.netloc:
+                    continue
+            except Exception:
+                continue
+                
+            # Check if we should follow external links
+            is_external = parsed.netloc != base_netloc
+            if is_external and not self.follow_external_links:
+                continue
+                
+            links.append({
+                "url": absolute_url,
+                "text": a.text.strip(),
+                "is_external": is_external
+            })
+        
+        # Extract images if enabled
+        images = []
+        if self.extract_images:
+            for img in nodes["img"]:
+                src = img.get('src')
+                if not src:
+                    continue
+                    
+                # Make relative URLs absolute
+                absolute_src = urljoin(url, src)
+                
+                images.append({
+                    "url": absolute_src,
+                    "alt": img.get('alt', ''),
+                    "title": img.get('title', ''),
+                    "width": img.get('width', ''),
+                    "height": img.get('height', '')
+                })
+        
+        # Extract schema.org data if enabled
+        schema_data = []
+        if self.extract_schema:
+            schema_data = self._extract_schema_from_nodes(nodes, url)
+        
+        return {
+            "title": title,
+            "text": text_content,
+            "links": links,
+            "images": images,
+            "schema_data": schema_data
+        }
+    
+    async def fetch_url(self, url: str, depth: int) -> Dict[str, Any]:
         """Fetch a URL and extract content."""
         # Parse URL to get domain for rate limiting
-        parsed_url = urlparse(url)
+        parsed_url = cached_urlparse(url)
         domain = f"{parsed_url.scheme}://{parsed_url.netloc}"
         
         # Check robots.txt
-        if not await self.is_allowed_by_robots(url, session):
+        if not await self.is_allowed_by_robots(url):
             logger.info(f"Skipping {url} (disallowed by robots.txt)")
             return {
                 "url": url,
@@ -374,233 +768,195 @@ class WebsiteCrawler:
             }
         
         # Remove URL fragment
-        url, _ = urldefrag(url)
+        url, _ = cached_urldefrag(url)
         
-        # Use domain-specific semaphore for per-domain rate limiting
-        domain_semaphore = await self.get_domain_semaphore(domain)
+        # Apply rate limiting
+        await self.delay_if_needed(domain)
         
-        # Use both global and domain-specific semaphores
-        async with self.request_semaphore, domain_semaphore:
-            # Apply rate limiting
-            await self.delay_if_needed(domain)
+        try:
+            # Fetch the URL
+            headers = {
+                "User-Agent": self.user_agent,
+                "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+                "Accept-Language": "en-US,en;q=0.5"
+            }
             
-            try:
-                # Fetch the URL
-                headers = {
-                    "User-Agent": self.user_agent,
-                    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
-                    "Accept-Language": "en-US,en;q=0.5"
-                }
-                
-                # Add conditional GET headers if we have cached this URL before
-                url_hash = hashlib.md5(url.encode('utf-8')).hexdigest()
-                if url_hash in self.content_cache:
-                    cache_entry = self.content_cache[url_hash]
-                    if "etag" in cache_entry:
-                        headers["If-None-Match"] = cache_entry["etag"]
-                    if "last_modified" in cache_entry:
-                        headers["If-Modified-Since"] = cache_entry["last_modified"]
+            # Add conditional GET headers if we have cached this URL before,
+            # and still hold the payload a 304 would be answered from
+            url_hash = self.compute_url_hash(url)
+            if url_hash in self.content_cache and self._has_page_payload(url_hash):
+                cache_entry = self.content_cache[url_hash]
+                if cache_entry.get("etag"):
+                    headers["If-None-Match"] = cache_entry["etag"]
+                if cache_entry.get("last_modified"):
+                    headers["If-Modified-Since"] = cache_entry["last_modified"]
+            
+            async with self._get_session().get(url, headers=headers,
+                                  allow_redirects=True, raise_for_status=False) as response:
+                # Handle redirects
+                if response.history:
+                    final_url = str(response.url)
+                    logger.info(f"Redirected: {url} -> {final_url}")
+                    url = final_url
                 
-                async with session.get(url, headers=headers, timeout=self.timeout, 
-                                      allow_redirects=True, raise_for_status=False) as response:
-                    # Handle redirects
-                    if response.history:
-                        final_url = str(response.url)
-                        logger.info(f"Redirected: {url} -> {final_url}")
-                        url = final_url
-                    
-                    # Handle not modified (304)
-                    if response.status == 304:
-                        logger.info(f"Content not modified: {url}")
-                        # Return cached data
-                        if url_hash in self.content_cache:
-                            return {
-                                "url": url,
-                                "success": True,
-                                "status_code": 304,
-                                "content_type": "text/html",  # Assuming HTML for cached content
-                                "from_cache": True,
-                                "depth": depth,
-                                "title": self.content_cache[url_hash].get("title", ""),
-                                "html": self.content_cache[url_hash].get("html", ""),
-                                "text": self.content_cache[url_hash].get("text", ""),
-                                "links": self.content_cache[url_hash].get("links", []),
-                                "images": self.content_cache[url_hash].get("images", []),
-                                "schema_data": self.content_cache[url_hash].get("schema_data", []),
-                                "content_hash": self.content_cache[url_hash].get("content_hash", ""),
-                                "change_data": {
-                                    "is_changed": False,
-                                    "first_seen": self.content_cache[url_hash].get("first_seen", ""),
-                                    "last_changed": self.content_cache[url_hash].get("last_changed", "")
-                                }
-                            }
-                    
-                    # Check if response is successful
-                    if response.status != 200:
-                        logger.warning(f"Failed to fetch {url}: HTTP {response.status}")
-                        return {
-                            "url": url,
-                            "success": False,
-                            "status_code": response.status,
-                            "error": f"HTTP {response.status}"
-                        }
-                    
-                    # Check content type
-                    content_type = response.headers.get('Content-Type', '').lower()
-                    if not content_type.startswith('text/html'):
-                        logger.info(f"Skipping non-HTML content: {url} ({content_type})")
+                # Handle not modified (304)
+                if response.status == 304:
+                    logger.info(f"Content not modified: {url}")
+                    # Return cached data
+                    if url_hash in self.content_cache:
+                        cache_entry = self.content_cache[url_hash]
+                        # Entries written before payloads were split out still hold them inline
+                        payload = self._load_page_payload(url_hash) or cache_entry
                         return {
                             "url": url,
-                            "success": False,
-                            "status_code": response.status,
-                            "content_type": content_type,
-                            "error": f"Not HTML content: {content_type}"
+                            "success": True,
+                            "status_code": 304,
+                            "content_type": "text/html",  # Assuming HTML for cached content
+                            "from_cache": True,
+                            "depth": depth,
+                            "title": cache_entry.get("title", ""),
+                            "html": payload.get("html", ""),
+                            "text": payload.get("text", ""),
+                            "links": payload.get("links", []),
+                            "images": payload.get("images", []),
+                            "schema_data": payload.get("schema_data", []),
+                            "content_hash": cache_entry.get("content_hash", ""),
+                            "change_data": {
+                                "is_changed": False,
+                                "first_seen": cache_entry.get("first_seen", ""),
+                                "last_changed": cache_entry.get("last_changed", "")
+                            }
                         }
-                    
-                    # Get ETag and Last-Modified headers for caching
-                    etag = response.headers.get('ETag')
-                    last_modified = response.headers.get('Last-Modified')
-                    
-                    # Limit response size to avoid memory issues
-                    content_length = int(response.headers.get('Content-Length', '0'))
-                    if content_length > self.max_file_size:
-                        logger.warning(f"Skipping large file: {url} ({content_length} bytes)")
+                
+                # Check if response is successful
+                if response.status != 200:
+                    logger.warning(f"Failed to fetch {url}: HTTP {response.status}")
+                    return {
+                        "url": url,
+                        "success": False,
+                        "status_code": response.status,
+                        "error": f"HTTP {response.status}"
+                    }
+                
+                # Check content type
+                content_type = response.headers.get('Content-Type', '').lower()
+                if not content_type.startswith('text/html'):
+                    logger.info(f"Skipping non-HTML content: {url} ({content_type})")
+                    return {
+                        "url": url,
+                        "success": False,
+                        "status_code": response.status,
+                        "content_type": content_type,
+                        "error": f"Not HTML content: {content_type}"
+                    }
+                
+                # Get ETag and Last-Modified headers for caching
+                etag = response.headers.get('ETag')
+                last_modified = response.headers.get('Last-Modified')
+                
+                # Limit response size to avoid memory issues
+                content_length = int(response.headers.get('Content-Length', '0'))
+                if content_length > self.max_file_size:
+                    logger.warning(f"Skipping large file: {url} ({content_length} bytes)")
+                    return {
+                        "url": url,
+                        "success": False,
+                        "status_code": response.status,
+                        "content_type": content_type,
+                        "error": f"File too large: {content_length} bytes"
+                    }
+                
+                # Read the body in chunks so a response without Content-Length
+                # is abandoned as soon as it passes max_file_size
+                body = bytearray()
+                async for chunk in response.content.iter_chunked(READ_CHUNK_SIZE):
+                    body.extend(chunk)
+                    if len(body) > self.max_file_size:
+                        logger.warning(f"Skipping large file: {url} (over {self.max_file_size} bytes)")
                         return {
                             "url": url,
                             "success": False,
                             "status_code": response.status,
                             "content_type": content_type,
-                            "error": f"File too large: {content_length} bytes"
+                            "error": f"File too large: over {self.max_file_size} bytes"
                         }
+                
+                html = decode_body(body, response.charset)
+                
+                # Parse in a worker thread so other fetches keep running meanwhile
+                page = await asyncio.to_thread(self._parse_page, html, url, parsed_url.netloc)
+                title = page["title"]
+                text_content = page["text"]
+                links = page["links"]
+                images = page["images"]
+                schema_data = page["schema_data"]
+                
+                # Compute content hash for diffing
+                content_hash = self.compute_content_hash(html)
+                
+                # Detect content changes
+                change_data = self.detect_content_changes(url, content_hash, html)
+                
+                # Update cache with ETag and Last-Modified
+                if url_hash in self.content_cache:
+                    cache_entry = self.content_cache[url_hash]
+                    cache_entry["etag"] = etag
+                    cache_entry["last_modified"] = last_modified
+                    cache_entry["title"] = title
+                    for field in PAGE_PAYLOAD_FIELDS:
+                        cache_entry.pop(field, None)
                     
-                    # Read the content
-                    html = await response.text()
-                    
-                    # Parse the HTML
-                    soup = BeautifulSoup(html, 'html.parser')
-                    
-                    # Extract information
-                    title = soup.title.text.strip() if soup.title else ""
-                    
-                    # Extract text content
-                    paragraphs = [p.text.strip() for p in soup.find_all('p') if p.text.strip()]
-                    text_content = "\n\n".join(paragraphs)
-                    
-                    # Extract links
-                    links = []
-                    for a in soup.find_all('a', href=True):
-                        href = a['href']
-                        if href.startswith('javascript:') or href.startswith('#'):
-                            continue
-                            
-                        # Make relative URLs absolute
-                        absolute_url = urljoin(url, href)
-                        
-                        # Skip mailto and tel links
-                        if absolute_url.startswith(('mailto:', 'tel:')):
-                            continue
-                            
-                        # Parse the URL to check if it's valid
-                        try:
-                            parsed = urlparse(absolute_url)
-                            if not parsed.scheme or not parsed.netloc:
-                                continue
-                        except Exception:
-                            continue
-                            
-                        # Check if we should follow external links
-                        is_external = urlparse(absolute_url).netloc != parsed_url.netloc
-                        if is_external and not self.follow_external_links:
-                            continue
-                            
-                        links.append({
-                            "url": absolute_url,
-                            "text": a.text.strip(),
-                            "is_external": is_external
-                        })
-                    
-                    # Extract images if enabled
-                    images = []
-                    if self.extract_images:
-                        for img in soup.find_all('img'):
-                            src = img.get('src')
-                            if not src:
-                                continue
-                                
-                            # Make relative URLs absolute
-                            absolute_src = urljoin(url, src)
-                            
-                            images.append({
-                                "url": absolute_src,
-                                "alt": img.get('alt', ''),
-                                "title": img.get('title', ''),
-                                "width": img.get('width', ''),
-                                "height": img.get('height', '')
-                            })
-                    
-                    # Extract schema.org data if enabled
-                    schema_data = []
-                    if self.extract_schema:
-                        schema_data = await self.extract_schema_org_data(soup, url)
-                    
-                    # Compute content hash for diffing
-                    content_hash = self.compute_content_hash(html)
-                    
-                    # Detect content changes
-                    change_data = self.detect_content_changes(url, content_hash, html)
-                    
-                    # Update cache with ETag and Last-Modified
-                    if url_hash in self.content_cache:
-                        self.content_cache[url_hash]["etag"] = etag
-                        self.content_cache[url_hash]["last_modified"] = last_modified
-                        self.content_cache[url_hash]["title"] = title
-                        self.content_cache[url_hash]["html"] = html
-                        self.content_cache[url_hash]["text"] = text_content
-                        self.content_cache[url_hash]["links"] = links
-                        self.content_cache[url_hash]["images"] = images
-                        self.content_cache[url_hash]["schema_data"] = schema_data
-                    
-                    return {
-                        "url": url,
-                        "success": True,
-                        "status_code": response.status,
-                        "content_type": content_type,
-                        "depth": depth,
-                        "title": title,
+                    # Written out with the next content cache checkpoint, or
+                    # kept in memory for later crawls when changes aren't tracked
+                    self.page_payloads[url_hash] = {
                         "html": html,
                         "text": text_content,
                         "links": links,
                         "images": images,
-                        "schema_data": schema_data,
-                        "content_hash": content_hash,
-                        "change_data": change_data
+                        "schema_data": schema_data
                     }
-            except aiohttp.ClientError as e:
-                logger.error(f"Client error fetching {url}: {str(e)}")
-                return {
-                    "url": url,
-                    "success": False,
-                    "error": f"Client error: {str(e)}"
-                }
-            except asyncio.TimeoutError:
-                logger.error(f"Timeout fetching {url}")
-                return {
-                    "url": url,
-                    "success": False,
-                    "error": "Timeout"
-                }
-            except Exception as e:
-                logger.error(f"Error fetching {url}: {str(e)}")
+                
                 return {
                     "url": url,
-                    "success": False,
-                    "error": str(e)
+                    "success": True,
+                    "status_code": response.status,
+                    "content_type": content_type,
+                    "depth": depth,
+                    "title": title,
+                    "html": html,
+                    "text": text_content,
+                    "links": links,
+                    "images": images,
+                    "schema_data": schema_data,
+                    "content_hash": content_hash,
+                    "change_data": change_data
                 }
-    
-    async def process_url(self, url: str, depth: int, session: aiohttp.ClientSession) -> None:
+        except aiohttp.ClientError as e:
+            logger.error(f"Client error fetching {url}: {str(e)}")
+            return {
+                "url": url,
+                "success": False,
+                "error": f"Client error: {str(e)}"
+            }
+        except asyncio.TimeoutError:
+            logger.error(f"Timeout fetching {url}")
+            return {
+                "url": url,
+                "success": False,
+                "error": "Timeout"
+            }
+        except Exception as e:
+            logger.error(f"Error fetching {url}: {str(e)}")
+            return {
+                "url": url,
+                "success": False,
+                "error": str(e)
+            }
+
+    async def process_url(self, url: str, depth: int) -> None:
         """Process a URL: fetch it and enqueue any new links."""
         # Skip if we've already crawled this URL or reached max pages
-        url, _ = urldefrag(url)  # Remove URL fragment
+        url, _ = cached_urldefrag(url)  # Remove URL fragment
         if url in self.crawled_urls or len(self.crawled_urls) >= self.max_pages:
             return
             
@@ -610,7 +966,7 @@ class WebsiteCrawler:
         self.crawled_urls.add(url)
         
         # Fetch the URL
-        result = await self.fetch_url(url, depth, session)
+        result = await self.fetch_url(url, depth)
         
         # If successful, add to results and enqueue links
         if result.get("success", False):
@@ -624,12 +980,14 @@ class WebsiteCrawler:
                     link_url = link["url"]
                     
                     # Check if we should crawl this URL
-                    if link_url not in self.crawled_urls and link_url not in self.failed_urls:
+                    if (link_url not in self.crawled_urls and link_url not in self.failed_urls and
+                            link_url not in self.enqueued_urls):
                         if link.get("is_external", False) and not self.follow_external_links:
                             continue
                             
                         # Add to queue with incremented depth
                         self.url_queue.append((link_url, depth + 1))
+                        self.enqueued_urls.add(link_url)
         else:
             # Mark as failed
             self.failed_urls.add(url)
@@ -652,7 +1010,8 @@ class WebsiteCrawler:
         # Initialize state
         self.crawled_urls = set()
         self.failed_urls = set()
-        self.url_queue = [(start_url, 0)]  # (url, depth)
+        self.url_queue = deque([(start_url, 0)])  # (url, depth)
+        self.enqueued_urls = {start_url}
         self.results = {
             "pages": {},
             "metadata": {
@@ -670,46 +1029,57 @@ class WebsiteCrawler:
             }
         }
         
-        # Configure HTTP session
-        timeout = ClientTimeout(total=self.timeout)
-        connector = TCPConnector(limit=self.max_concurrent_requests)
+        # Outside `async with crawler`, the session only lives for this crawl
+        close_session = self._session is None or self._session.closed
         
-        async with aiohttp.ClientSession(timeout=timeout, connector=connector) as session:
+        try:
             # Try to discover pages via sitemap if enabled
             if self.sitemap_discovery:
                 logger.info(f"Discovering pages via sitemap for {start_url}")
-                sitemap_urls = await self.fetch_sitemap(start_url, session)
+                sitemap_urls = await self.fetch_sitemap(start_url)
                 
                 # Add sitemap URLs to queue
                 for sitemap_url in sitemap_urls:
-                    if sitemap_url not in [u for u, _ in self.url_queue]:
+                    if sitemap_url not in self.enqueued_urls:
                         self.url_queue.append((sitemap_url, 0))
+                        self.enqueued_urls.add(sitemap_url)
                 
                 logger.info(f"Added {len(sitemap_urls)} URLs from sitemap")
                 
             # Process URLs in a breadth-first manner until queue is empty
             # or we've reached max pages
+            pages_at_last_save = 0
             with tqdm.asyncio.tqdm(total=self.max_pages, desc="Crawling") as pbar:
                 while self.url_queue and len(self.crawled_urls) < self.max_pages:
                     # Get the next batch of URLs to process
                     # (limited by our concurrency settings)
                     batch = []
                     while self.url_queue and len(batch) < self.max_concurrent_requests:
-                        batch.append(self.url_queue.pop(0))
+                        batch.append(self.url_queue.popleft())
                     
                     # Process the batch concurrently
-                    tasks = [self.process_url(url, depth, session) for url, depth in batch]
+                    tasks = [self.process_url(url, depth) for url, depth in batch]
                     await asyncio.gather(*tasks)
                     
                     # Update progress bar
                     pbar.update(len(self.crawled_urls) - pbar.n)
+                    
+                    # Checkpoint the content cache every few pages rather than per page
+                    if (self.track_changes and self.content_cache_dirty and
+                            len(self.crawled_urls) - pages_at_last_save >= CONTENT_CACHE_SAVE_INTERVAL):
+                        await asyncio.to_thread(self._save_content_cache)
+                        pages_at_last_save = len(self.crawled_urls)
+        finally:
+            if close_session:
+                await self.close()
         
         # Record end time
         self.results["metadata"]["end_time"] = datetime.now().isoformat()
         
         # Save content cache for future diffing
-        if self.track_changes:
+        if self.track_changes and self.content_cache_dirty:
             self._save_content_cache()
+        self._save_robots_cache()
         
         logger.info(f"Crawl completed: {len(self.crawled_urls)} pages crawled, "
                     f"{len(self.failed_urls)} failed")
@@ -766,7 +1136,7 @@ class WebsiteCrawler:
     def _url_to_filename(self, url: str, ext: str) -> str:
         """Convert a URL to a safe filename."""
         # Remove protocol and domain
-        parsed = urlparse(url)
+        parsed = cached_urlparse(url)
         path = parsed.path
         
         # Handle root URL
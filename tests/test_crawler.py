@@ -0,0 +1,258 @@
+"""
+Tests for the crawler module.
+"""
+import sys
+import os
+import asyncio
+import json
+import hashlib
+import tempfile
+import unittest
+from unittest import mock
+
+# Add the parent directory to the path so we can import the src module
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aiohttp import web
+
+import src.crawler
+from src.crawler import WebsiteCrawler, ROBOTS_RETRY_TTL
+
+PAGES = {
+    '/': '<html><head><title>Home</title></head><body><p>Home</p><a href="/about">About</a></body></html>',
+    '/about': '<html><head><title>About</title></head><body><p>About us</p></body></html>',
+}
+
+class CrawlerTestCase(unittest.IsolatedAsyncioTestCase):
+    """Runs a local site that answers conditional GETs with 304."""
+
+    async def asyncSetUp(self):
+        self.not_modified = 0
+
+        async def page(request):
+            etag = f'"{request.path}"'
+            if request.headers.get('If-None-Match') == etag:
+                self.not_modified += 1
+                return web.Response(status=304)
+            return web.Response(text=PAGES[request.path], content_type='text/html',
+                                headers={'ETag': etag})
+
+        app = web.Application()
+        for path in PAGES:
+            app.router.add_get(path, page)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, '127.0.0.1', 0)
+        await site.start()
+        self.base_url = f'http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}/'
+
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache_dir = os.path.join(self.tmp.name, 'cache')
+
+    async def asyncTearDown(self):
+        await self.runner.cleanup()
+        self.tmp.cleanup()
+
+    def make_crawler(self, **kwargs):
+        """Create a crawler that only talks to the local site, without delays."""
+        settings = {
+            'cache_dir': self.cache_dir,
+            'output_dir': os.path.join(self.tmp.name, 'output'),
+            'respect_robots_txt': False,
+            'sitemap_discovery': False,
+            'min_request_interval': 0,
+        }
+        settings.update(kwargs)
+        return WebsiteCrawler(**settings)
+
+class TestPagePayloadCache(CrawlerTestCase):
+    """Test cases for the page payloads kept apart from the content cache index."""
+
+    async def test_recrawl_without_track_changes(self):
+        """A 304 on a later crawl() of the same crawler still returns the page and its links."""
+        async with self.make_crawler(track_changes=False) as crawler:
+            await crawler.crawl(self.base_url)
+            results = await crawler.crawl(self.base_url)
+
+        self.assertEqual(self.not_modified, 2)
+        self.assertEqual(results['metadata']['total_pages'], 2)
+        home = results['pages'][self.base_url]
+        self.assertTrue(home['from_cache'])
+        self.assertEqual(home['html'], PAGES['/'])
+        self.assertEqual(len(home['links']), 1)
+        self.assertFalse(os.path.exists(os.path.join(self.cache_dir, 'content_cache.json')))
+
+    async def test_payloads_saved_outside_index(self):
+        """Payloads are written to their own files and read back by a new crawler on 304."""
+        await self.make_crawler().crawl(self.base_url)
+
+        crawler = self.make_crawler()
+        self.assertEqual(len(crawler.content_cache), 2)
+        for url_hash, entry in crawler.content_cache.items():
+            self.assertNotIn('html', entry)
+            self.assertTrue(os.path.exists(crawler._page_cache_path(url_hash)))
+
+        results = await crawler.crawl(self.base_url)
+        self.assertEqual(self.not_modified, 2)
+        self.assertEqual(results['metadata']['total_pages'], 2)
+        self.assertEqual(results['pages'][self.base_url]['html'], PAGES['/'])
+
+    async def test_missing_payload_skips_conditional_get(self):
+        """Without a payload to answer a 304 from, the page is fetched in full."""
+        await self.make_crawler().crawl(self.base_url)
+
+        crawler = self.make_crawler()
+        for url_hash in crawler.content_cache:
+            os.remove(crawler._page_cache_path(url_hash))
+
+        results = await crawler.crawl(self.base_url)
+        self.assertEqual(self.not_modified, 0)
+        self.assertEqual(results['metadata']['total_pages'], 2)
+
+    def test_unserializable_payload_is_logged(self):
+        """A payload that can't be encoded is logged instead of failing the page."""
+        crawler = self.make_crawler()
+        with self.assertLogs('src.crawler', level='ERROR'):
+            crawler._save_page_payload('abcd', {'html': object()})
+
+class TestContentCache(CrawlerTestCase):
+    """Test cases for the content cache index."""
+
+    async def test_legacy_cache_entries_are_rekeyed(self):
+        """MD5-keyed entries with SHA-256 content hashes keep their history."""
+        os.makedirs(self.cache_dir)
+        legacy = {
+            hashlib.md5(self.base_url.encode()).hexdigest(): {
+                'url': self.base_url,
+                'content_hash': hashlib.sha256(PAGES['/'].encode()).hexdigest(),
+                'first_seen': '2020-01-01T00:00:00',
+                'last_changed': '2020-01-02T00:00:00',
+            }
+        }
+        with open(os.path.join(self.cache_dir, 'content_cache.json'), 'w') as f:
+            json.dump(legacy, f)
+
+        crawler = self.make_crawler(max_pages=1)
+        self.assertEqual(list(crawler.content_cache), [crawler.compute_url_hash(self.base_url)])
+
+        results = await crawler.crawl(self.base_url)
+        change_data = results['pages'][self.base_url]['change_data']
+        self.assertFalse(change_data['is_changed'])
+        self.assertEqual(change_data['first_seen'], '2020-01-01T00:00:00')
+        self.assertEqual(change_data['last_changed'], '2020-01-02T00:00:00')
+
+class TestRobotsCache(CrawlerTestCase):
+    """Test cases for caching robots.txt fetches."""
+
+    async def test_transient_failure_is_retried_soon(self):
+        """A robots.txt fetch that fails to connect is not reused for the full TTL."""
+        async with self.make_crawler() as crawler:
+            # The local site has no /robots.txt route, so it answers 404
+            await crawler.fetch_robots_txt(self.base_url)
+            self.assertFalse(crawler.robots_cache[self.base_url]['transient'])
+
+            await self.runner.cleanup()  # Connection refused from now on
+            crawler.robots_cache.clear()
+            await crawler.fetch_robots_txt(self.base_url)
+            entry = crawler.robots_cache[self.base_url]
+            self.assertTrue(entry['transient'])
+
+            entry['fetched_at'] -= ROBOTS_RETRY_TTL + 1
+            await crawler.fetch_robots_txt(self.base_url)
+            self.assertGreater(crawler.robots_cache[self.base_url]['fetched_at'], entry['fetched_at'])
+
+class TestSitemapLimits(CrawlerTestCase):
+    """Test cases for the bounds on sitemap downloads."""
+
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        self.interval = 0  # seconds between sitemap entries
+
+        async def endless_sitemap(request):
+            # A well-formed stream of entries that never closes <urlset>
+            response = web.StreamResponse(headers={'Content-Type': 'application/xml'})
+            await response.prepare(request)
+            await response.write(b'<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">')
+            i = 0
+            while True:
+                await response.write(f'<url><loc>{self.base_url}p{i}</loc></url>'.encode())
+                i += 1
+                await asyncio.sleep(self.interval)
+
+        # The base site is already running, so serve sitemaps from a second one
+        app = web.Application()
+        app.router.add_get('/sitemap.xml', endless_sitemap)
+        self.sitemap_runner = web.AppRunner(app)
+        await self.sitemap_runner.setup()
+        site = web.TCPSite(self.sitemap_runner, '127.0.0.1', 0)
+        await site.start()
+        self.sitemap_url = f'http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}/sitemap.xml'
+
+    async def asyncTearDown(self):
+        await self.sitemap_runner.cleanup()
+        await super().asyncTearDown()
+
+    async def read_sitemap(self):
+        urls = set()
+        async with self.make_crawler() as crawler:
+            await asyncio.wait_for(crawler._read_sitemap(self.sitemap_url, self.base_url, urls, set()), timeout=5)
+        return urls
+
+    async def test_oversized_sitemap_is_truncated(self):
+        """Reading stops at SITEMAP_MAX_BYTES, keeping the entries parsed before it."""
+        with mock.patch.object(src.crawler, 'SITEMAP_MAX_BYTES', 64 * 1024), \
+                self.assertLogs('src.crawler', level='WARNING'):
+            urls = await self.read_sitemap()
+        self.assertGreater(len(urls), 0)
+
+    async def test_trickling_sitemap_times_out(self):
+        """A sitemap that keeps sending bytes is still cut off after SITEMAP_FETCH_TIMEOUT."""
+        self.interval = 0.05
+        with mock.patch.object(src.crawler, 'SITEMAP_FETCH_TIMEOUT', 0.5), \
+                self.assertLogs('src.crawler', level='WARNING'):
+            urls = await self.read_sitemap()
+        self.assertEqual(urls, set())
+
+class TestConnectionPool(unittest.IsolatedAsyncioTestCase):
+    """Test cases for requests queued behind the per-host connection limit."""
+
+    async def asyncSetUp(self):
+        async def home(request):
+            links = ''.join(f'<a href="/slow/{i}">{i}</a>' for i in range(6))
+            return web.Response(text=f'<html><body>{links}</body></html>', content_type='text/html')
+
+        async def slow(request):
+            await asyncio.sleep(0.3)
+            return web.Response(text='<html><body><p>Slow</p></body></html>', content_type='text/html')
+
+        app = web.Application()
+        app.router.add_get('/', home)
+        app.router.add_get('/slow/{i}', slow)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, '127.0.0.1', 0)
+        await site.start()
+        self.base_url = f'http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}/'
+        self.tmp = tempfile.TemporaryDirectory()
+
+    async def asyncTearDown(self):
+        await self.runner.cleanup()
+        self.tmp.cleanup()
+
+    async def test_queued_requests_do_not_time_out(self):
+        """Waiting for a free connection to the host does not count against the timeout."""
+        crawler = WebsiteCrawler(
+            cache_dir=os.path.join(self.tmp.name, 'cache'),
+            output_dir=os.path.join(self.tmp.name, 'output'),
+            respect_robots_txt=False,
+            sitemap_discovery=False,
+            min_request_interval=0,
+            max_concurrent_requests=6,
+            timeout=0.5,
+        )
+        results = await crawler.crawl(self.base_url)
+        self.assertEqual(results['metadata']['failed_pages'], 0)
+        self.assertEqual(results['metadata']['total_pages'], 7)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+"""
+Tests for the download_images module.
+"""
+import sys
+import os
+import asyncio
+import tempfile
+import unittest
+from unittest import mock
+
+# Add the parent directory to the path so we can import the module
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aiohttp import web
+
+from download_images import ImageDownloader
+
+PAGES = {
+    '/': '<html><body><img src="/img/logo.png"><a href="/a">A</a><a href="/b">B</a></body></html>',
+    '/a': '<html><body><img src="/img/logo.png"><img src="/img/a1.png"><img src="/img/a2.png"></body></html>',
+    '/b': '<html><body><img src="/img/logo.png"><img src="/img/b1.png"><img src="/img/missing.png"></body></html>',
+}
+
+class TestDownloadAllImages(unittest.IsolatedAsyncioTestCase):
+    """Test cases for the page extraction and image download pipeline."""
+
+    async def asyncSetUp(self):
+        self.image_requests = []
+
+        async def page(request):
+            return web.Response(text=PAGES[request.path], content_type='text/html')
+
+        async def image(request):
+            name = request.match_info['name']
+            self.image_requests.append(name)
+            if name == 'missing.png':
+                return web.Response(status=404)
+            return web.Response(body=name.encode(), content_type='image/png')
+
+        app = web.Application()
+        for path in PAGES:
+            app.router.add_get(path, page)
+        app.router.add_get('/img/{name}', image)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, '127.0.0.1', 0)
+        await site.start()
+        self.base_url = f'http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}'
+
+        self.tmp = tempfile.TemporaryDirectory()
+        self.output_dir = os.path.join(self.tmp.name, 'images')
+
+    async def asyncTearDown(self):
+        await self.runner.cleanup()
+        self.tmp.cleanup()
+
+    def make_downloader(self):
+        return ImageDownloader(self.base_url, self.output_dir,
+                               cache_dir=os.path.join(self.tmp.name, 'cache'),
+                               retry_delay=0, concurrent_downloads=2)
+
+    async def test_downloads_each_image_once(self):
+        """Images found on several pages are downloaded once, and failures are counted."""
+        stats = await self.make_downloader().download_all_images()
+
+        self.assertEqual(stats['total_images_found'], 5)
+        self.assertEqual(stats['new_downloads'], 4)
+        self.assertEqual(stats['failed'], 1)
+        self.assertEqual(stats['successful_downloads'], 4)
+        self.assertEqual(sorted(self.image_requests), ['a1.png', 'a2.png', 'b1.png', 'logo.png', 'missing.png'])
+        self.assertEqual(sorted(os.listdir(self.output_dir)), ['a1.png', 'a2.png', 'b1.png', 'logo.png'])
+        with open(os.path.join(self.output_dir, 'a1.png'), 'rb') as f:
+            self.assertEqual(f.read(), b'a1.png')
+
+    async def test_fresh_images_are_skipped_and_counted(self):
+        """A second run skips fresh images without requests but still counts them as successful."""
+        await self.make_downloader().download_all_images()
+        self.image_requests.clear()
+
+        stats = await self.make_downloader().download_all_images()
+        self.assertEqual(stats['cached'], 4)
+        self.assertEqual(stats['new_downloads'], 0)
+        self.assertEqual(stats['successful_downloads'], 4)
+        self.assertEqual(self.image_requests, ['missing.png'])
+
+    async def test_unexpected_error_does_not_stall_queue(self):
+        """A download that raises is counted as failed and the other downloads still finish."""
+        downloader = self.make_downloader()
+        download_image = downloader.download_image
+
+        async def flaky_download(session, url, filename):
+            if url.endswith('/a1.png'):
+                raise RuntimeError('boom')
+            return await download_image(session, url, filename)
+
+        with mock.patch.object(downloader, 'download_image', flaky_download), \
+                self.assertLogs('download_images', level='ERROR'):
+            stats = await asyncio.wait_for(downloader.download_all_images(), timeout=5)
+
+        self.assertEqual(stats['failed'], 2)
+        self.assertEqual(stats['successful_downloads'], 3)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+"""
+Tests for the image_downloader module.
+"""
+import sys
+import os
+import asyncio
+import hashlib
+import tempfile
+import unittest
+from unittest import mock
+
+# Add the parent directory to the path so we can import the module
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import aiohttp
+from aiohttp import web
+
+import image_downloader
+from image_downloader import ImageDownloader
+
+class TestDownloadImages(unittest.IsolatedAsyncioTestCase):
+    """Test cases for ImageDownloader.download_images."""
+
+    async def asyncSetUp(self):
+        """Start a local image server that answers slowly."""
+        async def slow_image(request):
+            await asyncio.sleep(0.3)
+            return web.Response(body=b'\x89PNG', content_type='image/png')
+
+        app = web.Application()
+        app.router.add_get('/img/{name}', slow_image)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, '127.0.0.1', 0)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+
+        self.tmp = tempfile.TemporaryDirectory()
+        self.html_dir = os.path.join(self.tmp.name, 'html')
+        self.output_dir = os.path.join(self.tmp.name, 'images')
+        os.makedirs(self.html_dir)
+
+    async def asyncTearDown(self):
+        await self.runner.cleanup()
+        self.tmp.cleanup()
+
+    async def test_queued_downloads_do_not_time_out(self):
+        """Downloads waiting for a connection slot are not charged against the timeout."""
+        imgs = ''.join(
+            f'<img src="http://127.0.0.1:{self.port}/img/{i}.png">' for i in range(6)
+        )
+        with open(os.path.join(self.html_dir, 'page.html'), 'w') as f:
+            f.write(f'<html><body>{imgs}</body></html>')
+
+        # Two connections per host, so the six downloads run in three rounds
+        # of 0.3s; only the first round would fit in a 0.5s timeout if queued
+        # requests were started together.
+        with mock.patch.object(image_downloader, 'MAX_CONNECTIONS_PER_HOST', 2), \
+                mock.patch.object(image_downloader, 'DOWNLOAD_TIMEOUT', 0.5):
+            stats = await ImageDownloader(self.html_dir, self.output_dir).download_images()
+
+        self.assertEqual(stats['images_found'], 6)
+        self.assertEqual(stats['images_downloaded'], 6)
+
+class TestLegacyFilenames(unittest.IsolatedAsyncioTestCase):
+    """Test cases for images saved under names from earlier versions."""
+
+    async def test_legacy_file_is_reused(self):
+        """An extensionless image saved under its old MD5 name is renamed, not downloaded again."""
+        url = 'http://127.0.0.1:9/photo?id=1'
+        with tempfile.TemporaryDirectory() as tmp:
+            downloader = ImageDownloader(tmp, tmp)
+            legacy_path = os.path.join(tmp, hashlib.md5(url.encode()).hexdigest() + '.jpg')
+            with open(legacy_path, 'wb') as f:
+                f.write(b'\x89PNG')
+
+            img = {'url': url, 'alt': '', 'filename': image_downloader.url_to_filename(url)}
+            async with aiohttp.ClientSession() as session:
+                self.assertTrue(await downloader.download_image(session, img))
+
+            self.assertEqual(downloader.stats['images_existing'], 1)
+            self.assertFalse(os.path.exists(legacy_path))
+            self.assertTrue(os.path.exists(os.path.join(tmp, img['filename'])))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,187 @@
+"""
+Tests for the serverless_crawler module.
+"""
+import sys
+import os
+import json
+import asyncio
+import tempfile
+import unittest
+import contextlib
+from unittest import mock
+
+# Add the parent directory to the path so we can import the module
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import aiofiles
+from aiohttp import web
+
+from serverless_crawler import ServerlessCrawler, close_shared_session
+
+class ServerlessCrawlerTestCase(unittest.IsolatedAsyncioTestCase):
+    """Runs a local site whose home page links to PAGE_COUNT pages."""
+
+    PAGE_COUNT = 8
+    PAGE_DELAY = 0.1  # seconds each linked page takes to answer
+
+    async def asyncSetUp(self):
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+        async def home(request):
+            links = ''.join(f'<a href="/page{i}">{i}</a>' for i in range(self.PAGE_COUNT))
+            return web.Response(text=f'<html><body>{links}</body></html>', content_type='text/html')
+
+        async def page(request):
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            try:
+                await asyncio.sleep(self.PAGE_DELAY)
+            finally:
+                self.in_flight -= 1
+            return web.Response(text='<html><body><p>Page</p></body></html>', content_type='text/html')
+
+        app = web.Application()
+        app.router.add_get('/', home)
+        app.router.add_get('/page{i}', page)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, '127.0.0.1', 0)
+        await site.start()
+        self.base_url = f'http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}/'
+
+        self.tmp = tempfile.TemporaryDirectory()
+        self.output_dir = os.path.join(self.tmp.name, 'job')
+
+    async def asyncTearDown(self):
+        await close_shared_session()
+        await self.runner.cleanup()
+        self.tmp.cleanup()
+
+    def make_crawler(self, **kwargs):
+        return ServerlessCrawler(self.base_url, job_id='job', output_dir=self.output_dir, **kwargs)
+
+class TestProcessBatch(ServerlessCrawlerTestCase):
+    """Test cases for ServerlessCrawler.process_batch."""
+
+    async def test_refills_slots_until_queue_drains(self):
+        """Pages found during a batch are crawled in the same batch, batch_size at a time."""
+        result = await self.make_crawler().process_batch(batch_size=3, timeout=5)
+
+        self.assertEqual(result['status'], 'completed')
+        self.assertEqual(result['total_processed'], self.PAGE_COUNT + 1)
+        self.assertEqual(result['remaining'], 0)
+        self.assertEqual(self.max_in_flight, 3)
+
+    async def test_max_pages_stops_refilling(self):
+        """No new requests start once max_pages pages have been crawled."""
+        result = await self.make_crawler(max_pages=3).process_batch(batch_size=2, timeout=5)
+
+        self.assertLessEqual(result['total_processed'], 3 + 1)
+        self.assertGreater(result['remaining'], 0)
+
+    async def test_deadline_requeues_unfinished_urls(self):
+        """Requests cut off by the time budget go back on the queue without partial files."""
+        self.PAGE_DELAY = 2
+        crawler = self.make_crawler()
+        result = await crawler.process_batch(batch_size=4, timeout=0.5)
+
+        self.assertEqual(result['status'], 'running')
+        self.assertEqual(result['total_processed'], 1)
+        self.assertEqual(result['remaining'], self.PAGE_COUNT)
+        self.assertEqual(crawler.state['in_progress'], set())
+        self.assertEqual([name for name in os.listdir(crawler.html_dir) if name.endswith('.part')], [])
+
+    async def test_deadline_during_write_removes_part_file(self):
+        """A page whose save is cut off by the time budget leaves no partial file."""
+        open_file = aiofiles.open
+
+        class StalledFile:
+            def __init__(self, f):
+                self.f = f
+
+            async def write(self, data):
+                await self.f.write(data)
+                await asyncio.sleep(10)
+
+        @contextlib.asynccontextmanager
+        async def stalled_open(path, *args, **kwargs):
+            async with open_file(path, *args, **kwargs) as f:
+                yield StalledFile(f)
+
+        crawler = self.make_crawler()
+        with mock.patch.object(aiofiles, 'open', stalled_open):
+            result = await crawler.process_batch(batch_size=4, timeout=0.5)
+
+        self.assertEqual(result['status'], 'running')
+        self.assertEqual(result['total_processed'], 0)
+        self.assertEqual(crawler.state['in_progress'], set())
+        self.assertEqual(os.listdir(crawler.html_dir), [])
+
+class TestUrlLogs(ServerlessCrawlerTestCase):
+    """Test cases for the visited and links_found NDJSON logs."""
+
+    def read_log(self, key):
+        with open(os.path.join(self.output_dir, f'{key}.ndjson'), 'rb') as f:
+            return [json.loads(line) for line in f]
+
+    async def test_sets_are_logged_outside_state(self):
+        """state.json holds counts only, and each URL is appended to a log once."""
+        await self.make_crawler().process_batch(batch_size=3, timeout=5)
+
+        with open(os.path.join(self.output_dir, 'state.json')) as f:
+            state = json.load(f)
+        self.assertNotIn('visited', state)
+        self.assertNotIn('links_found', state)
+        self.assertEqual(state['visited_count'], self.PAGE_COUNT + 1)
+
+        visited = self.read_log('visited')
+        self.assertEqual(len(visited), len(set(visited)))
+        self.assertEqual(len(visited), self.PAGE_COUNT + 1)
+        self.assertEqual(len(self.read_log('links_found')), self.PAGE_COUNT)
+
+        # Saving again with nothing new appends nothing
+        crawler = self.make_crawler()
+        crawler.save_state()
+        self.assertEqual(len(self.read_log('visited')), self.PAGE_COUNT + 1)
+
+    async def test_logs_are_replayed_on_load(self):
+        """A new crawler for the job rebuilds its sets from the logs, skipping a torn line."""
+        await self.make_crawler().process_batch(batch_size=3, timeout=5)
+        with open(os.path.join(self.output_dir, 'visited.ndjson'), 'ab') as f:
+            f.write(b'"http://127.0.0.1/cut-sh')
+
+        crawler = self.make_crawler()
+        self.assertEqual(len(crawler.state['visited']), self.PAGE_COUNT + 1)
+        self.assertIn(self.base_url, crawler.state['visited'])
+        self.assertEqual(len(crawler.state['links_found']), self.PAGE_COUNT)
+
+        # URLs appended after the torn line survive the next replay
+        crawler.state['visited'].add('http://127.0.0.1/next')
+        crawler.save_state()
+        crawler = self.make_crawler()
+        self.assertIn('http://127.0.0.1/next', crawler.state['visited'])
+        self.assertEqual(len(self.read_log('visited')), self.PAGE_COUNT + 2)
+
+    def test_legacy_state_lists_move_to_logs(self):
+        """State files that still hold the full lists load, and the lists move to the logs on save."""
+        os.makedirs(self.output_dir)
+        with open(os.path.join(self.output_dir, 'state.json'), 'w') as f:
+            json.dump({
+                'job_id': 'job', 'url': self.base_url, 'start_time': '2020-01-01T00:00:00',
+                'status': 'running', 'queue': [], 'in_progress': [],
+                'visited': [self.base_url], 'links_found': [self.base_url + 'page0'],
+                'pages_crawled': 1, 'resources_downloaded': {}, 'errors': [], 'last_run': None,
+            }, f)
+
+        crawler = self.make_crawler()
+        self.assertEqual(crawler.state['visited'], {self.base_url})
+        crawler.save_state()
+
+        self.assertEqual(self.read_log('visited'), [self.base_url])
+        self.assertEqual(self.read_log('links_found'), [self.base_url + 'page0'])
+        with open(os.path.join(self.output_dir, 'state.json')) as f:
+            self.assertNotIn('visited', json.load(f))
+
+if __name__ == "__main__":
+    unittest.main()